@@ -13,255 +13,50 @@ import argparse
 import configparser
 import datetime
 import errno
+import functools
 import glob
 import io
 import itertools
 import math
+import mmap
 import multiprocessing
 import os
 import random
 import re
-import shlex
 import shutil
 import signal
 import string
 import subprocess
 import sys
 import tempfile
+import threading
 import time
-from collections import namedtuple
 from concurrent import futures
-from pathlib import Path
-from xml.etree import ElementTree
 
-import PyPDF2
 import psutil
-from PIL import Image, ImageChops
-from PyPDF2.errors import PdfReadError
-from PyPDF2.generic import ByteStringObject
-from bs4 import BeautifulSoup
-from packaging.version import parse as parse_version
-from reportlab.lib.units import inch
-from reportlab.pdfgen.canvas import Canvas
-
-__author__ = 'Leonardo F. Cardoso'
-
-VERSION = '1.12.0 marapurense '
-
 
-def eprint(*args, **kwargs):
-    print(*args, file=sys.stderr, flush=True, **kwargs)
-
-
-def do_pdftoimage(param_path_pdftoppm, param_page_range, param_input_file, param_image_resolution, param_tmp_dir,
-                  param_prefix, param_shell_mode):
-    """
-    Will be called from multiprocessing, so no global variables are allowed.
-    Convert PDF to image file.
-    """
-    command_line_list = [param_path_pdftoppm]
-    first_page = 0
-    last_page = 0
-    if param_page_range is not None:
-        first_page = param_page_range[0]
-        last_page = param_page_range[1]
-        command_line_list += ['-f', str(first_page), '-l', str(last_page)]
-    #
-    command_line_list += ['-r', str(param_image_resolution), '-jpeg', param_input_file, param_tmp_dir + param_prefix]
-    pimage = subprocess.Popen(command_line_list, stdout=subprocess.DEVNULL,
-                              stderr=open(param_tmp_dir + "pdftoppm_err_{0}-{1}-{2}.log".format(param_prefix, first_page, last_page), "wb"),
-                              shell=param_shell_mode)
-    pimage.wait()
-    return pimage.returncode
-
-
-def do_autorotate_info(param_image_file, param_shell_mode, param_temp_dir, param_tess_lang, param_path_tesseract, param_tesseract_version):
-    """
-    Will be called from multiprocessing, so no global variables are allowed.
-    Do autorotate of images based on tesseract (execution with 'psm 0') information.
-    """
-    param_image_no_ext = os.path.splitext(os.path.basename(param_image_file))[0]
-    psm_parameter = "-psm" if (param_tesseract_version == 3) else "--psm"
-    tess_command_line = [param_path_tesseract, '-l', "osd+" + param_tess_lang, psm_parameter, '0', param_image_file,
-                         param_temp_dir + param_image_no_ext]
-    ptess1 = subprocess.Popen(tess_command_line,
-                              stdout=open(param_temp_dir + "autorot_tess_out_{0}.log".format(param_image_no_ext), "wb"),
-                              stderr=open(param_temp_dir + "autorot_tess_err_{0}.log".format(param_image_no_ext), "wb"),
-                              shell=param_shell_mode)
-    ptess1.wait()
-
-
-def do_deskew(param_image_file, param_threshold, param_shell_mode, param_path_mogrify):
-    """
-    Will be called from multiprocessing, so no global variables are allowed.
-    Do a deskew of image.
-    """
-    pd = subprocess.Popen([param_path_mogrify, '-deskew', param_threshold, param_image_file], shell=param_shell_mode)
-    pd.wait()
-    return True
-
-
-def do_ocr_tesseract(param_image_file, param_extra_ocr_flag, param_tess_lang, param_tess_psm, param_temp_dir, param_shell_mode, param_path_tesseract,
-                     param_text_generation_strategy, param_delete_temps, param_tess_can_textonly_pdf):
-    """
-    Will be called from multiprocessing, so no global variables are allowed.
-    Do OCR of image with tesseract
-    """
-    param_image_no_ext = os.path.splitext(os.path.basename(param_image_file))[0]
-    tess_command_line = [param_path_tesseract]
-    if type(param_extra_ocr_flag) == str:
-        tess_command_line.extend(param_extra_ocr_flag.split(" "))
-    tess_command_line.extend(['-l', param_tess_lang])
-    if param_text_generation_strategy == "tesseract":
-        tess_command_line += ['-c', 'tessedit_create_pdf=1']
-        if param_tess_can_textonly_pdf:
-            tess_command_line += ['-c', 'textonly_pdf=1']
-    #
-    if param_text_generation_strategy == "native":
-        tess_command_line += ['-c', 'tessedit_create_hocr=1']
-    #
-    tess_command_line += [
-        '-c', 'tessedit_create_txt=1',
-        '-c', 'tessedit_pageseg_mode=' + param_tess_psm,
-        param_image_file, param_temp_dir + param_image_no_ext]
-    pocr = subprocess.Popen(tess_command_line,
-                            stdout=subprocess.DEVNULL,
-                            stderr=open(param_temp_dir + "tess_err_{0}.log".format(param_image_no_ext), "wb"),
-                            shell=param_shell_mode)
-    pocr.wait()
-    if param_text_generation_strategy == "tesseract" and (not param_tess_can_textonly_pdf):
-        pdf_file = param_temp_dir + param_image_no_ext + ".pdf"
-        pdf_file_tmp = param_temp_dir + param_image_no_ext + ".tesspdf"
-        os.rename(pdf_file, pdf_file_tmp)
-        output_pdf = PyPDF2.PdfWriter()
-        desc_pdf_file_tmp = open(pdf_file_tmp, 'rb')
-        tess_pdf = PyPDF2.PdfReader(desc_pdf_file_tmp, strict=False)
-        for i in range(len(tess_pdf.pages)):
-            imagepage = tess_pdf.pages[i]
-            output_pdf.addPage(imagepage)
-        #
-        output_pdf.removeImages(ignoreByteStringObject=False)
-        out_page = output_pdf.getPage(0)  # Tesseract PDF is always one page in this software
-        # Hack to obtain smaller file (delete the image reference)
-        out_page["/Resources"][PyPDF2.generic.createStringObject("/XObject")] = PyPDF2.generic.ArrayObject()
-        out_page.compressContentStreams()
-        with open(pdf_file, 'wb') as f:
-            output_pdf.write(f)
-        desc_pdf_file_tmp.close()
-        # Try to save some temp space as tesseract generate PDF with same size of image
-        if param_delete_temps:
-            os.remove(pdf_file_tmp)
-    #
-    if param_text_generation_strategy == "native":
-        hocr = HocrTransform(param_temp_dir + param_image_no_ext + ".hocr", 300)
-        hocr.to_pdf(param_temp_dir + param_image_no_ext + ".pdf", image_file_name=None, show_bounding_boxes=False,
-                    invisible_text=True)
-    # Track progress in all situations
-    Path(param_temp_dir + param_image_no_ext + ".tmp").touch()  # .tmp files are used to track overall progress
-
-
-def do_ocr_cuneiform(param_image_file, param_extra_ocr_flag, param_cunei_lang, param_temp_dir, param_shell_mode, param_path_cunei):
-    """
-    Will be called from multiprocessing, so no global variables are allowed.
-    Do OCR of image with cuneiform
-    """
-    param_image_no_ext = os.path.splitext(os.path.basename(param_image_file))[0]
-    cunei_command_line = [param_path_cunei]
-    if type(param_extra_ocr_flag) == str:
-        cunei_command_line.extend(param_extra_ocr_flag.split(" "))
-    cunei_command_line.extend(['-l', param_cunei_lang.lower(), "-f", "hocr", "-o", param_temp_dir + param_image_no_ext + ".hocr", param_image_file])
-    #
-    pocr = subprocess.Popen(cunei_command_line,
-                            stdout=open(param_temp_dir + "cuneif_out_{0}.log".format(param_image_no_ext), "wb"),
-                            stderr=open(param_temp_dir + "cuneif_err_{0}.log".format(param_image_no_ext), "wb"),
-                            shell=param_shell_mode)
-    pocr.wait()
-    # Sometimes, cuneiform fails to OCR and expected HOCR file is missing. Experiments show that English can be used to try a workaround.
-    if not os.path.isfile(param_temp_dir + param_image_no_ext + ".hocr") and param_cunei_lang.lower() != "eng":
-        eprint("Warning: fail to OCR file '{0}'. Trying again with English language.".format(param_image_no_ext))
-        cunei_command_line = [param_path_cunei]
-        if type(param_extra_ocr_flag) == str:
-            cunei_command_line.extend(param_extra_ocr_flag.split(" "))
-        cunei_command_line.extend(['-l', "eng", "-f", "hocr", "-o", param_temp_dir + param_image_no_ext + ".hocr", param_image_file])
-        pocr = subprocess.Popen(cunei_command_line,
-                                stdout=open(param_temp_dir + "cuneif_out_eng_{0}.log".format(param_image_no_ext), "wb"),
-                                stderr=open(param_temp_dir + "cuneif_err_eng_{0}.log".format(param_image_no_ext), "wb"),
-                                shell=param_shell_mode)
-        pocr.wait()
-    #
-    bs_parser = "lxml"
-    if os.path.isfile(param_temp_dir + param_image_no_ext + ".hocr"):
-        # Try to fix unclosed meta tags, as cuneiform HOCR may be not well formed
-        with open(param_temp_dir + param_image_no_ext + ".hocr", "r") as fpr:
-            corrected_hocr = str(BeautifulSoup(fpr, bs_parser))
-    else:
-        eprint("Warning: fail to OCR file '{0}'. Page will not contain text.".format(param_image_no_ext))
-        # TODO try to use the same size as original PDF page (bbox is hard coded by now to look like A4 page - portrait)
-        corrected_hocr = str(BeautifulSoup('<div class="ocr_page" id="page_1" title="image x; bbox 0 0 1700 2400">', bs_parser))
-    with open(param_temp_dir + param_image_no_ext + ".fixed.hocr", "w") as fpw:
-        fpw.write(corrected_hocr)
-    #
-    hocr = HocrTransform(param_temp_dir + param_image_no_ext + ".fixed.hocr", 300)
-    hocr.to_pdf(param_temp_dir + param_image_no_ext + ".pdf", image_file_name=None, show_bounding_boxes=False, invisible_text=True)
-    # Track progress
-    Path(param_temp_dir + param_image_no_ext + ".tmp").touch()  # .tmp files are used to track overall progress
+try:
+    import img2pdf
+except ImportError:
+    img2pdf = None  # Optional. Used to embed JPEG pages into PDF without re-encoding when available.
+from packaging.version import parse as parse_version
 
+# PyPDF2 is imported inside the methods that need it: with the 'spawn' start method (Windows) every
+# pool worker re-imports this module, and must not pay for imports only the main process uses.
 
-def do_rebuild(param_image_file, param_path_convert, param_convert_params, param_tmp_dir, param_shell_mode):
-    """
-    Will be called from multiprocessing, so no global variables are allowed.
-    Create one PDF file from image file.
-    """
-    param_image_no_ext = os.path.splitext(os.path.basename(param_image_file))[0]
-    # http://stackoverflow.com/questions/79968/split-a-string-by-spaces-preserving-quoted-substrings-in-python
-    convert_params_list = shlex.split(param_convert_params)
-    command_rebuild = [param_path_convert, param_image_file] + convert_params_list + [param_tmp_dir + "REBUILD_" + param_image_no_ext + ".pdf"]
-    prebuild = subprocess.Popen(
-        command_rebuild,
-        stdout=open(param_tmp_dir + "convert_log_{0}.log".format(param_image_no_ext), "wb"),
-        stderr=open(param_tmp_dir + "convert_err_{0}.log".format(param_image_no_ext), "wb"),
-        shell=param_shell_mode)
-    prebuild.wait()
-
-
-def do_check_img_greyscale(param_image_file):
-    """
-    Inspired in code provided by karl-k:
-    https://stackoverflow.com/questions/23660929/how-to-check-whether-a-jpeg-image-is-color-or-gray-scale-using-only-python-stdli
-    Check if image is monochrome (1 channel or 3 identical channels)
-    """
-    im = Image.open(param_image_file).convert('RGB')
-    rgb = im.split()
-    if ImageChops.difference(rgb[0], rgb[1]).getextrema()[1] != 0:
-        return False
-    if ImageChops.difference(rgb[0], rgb[2]).getextrema()[1] != 0:
-        return False
-    #
-    return True
+from pdf2pdfocr_workers import (_init_tesserocr_worker, do_autorotate_info, do_check_img_colors_size, do_check_img_greyscale,
+                                do_create_blank_pdf, do_deskew, do_ocr_cuneiform, do_ocr_cuneiform_star, do_ocr_tesseract,
+                                do_ocr_tesseract_batch, do_ocr_tesseract_batch_star, do_ocr_tesseract_star, do_pdftoimage, do_rebuild,
+                                eprint)
 
+__author__ = 'Leonardo F. Cardoso'
 
-def do_check_img_colors_size(param_image_file):
-    """
-    Inspired in code provided by Raffael:
-    https://stackoverflow.com/questions/14041562/python-pil-detect-if-an-image-is-completely-black-or-white
-    Check if image is single color
-    """
-    im = Image.open(param_image_file)
-    colors = im.getcolors()
-    width, height = im.size
-    return colors, (width, height)
+VERSION = '1.12.0 marapurense '
 
+OUR_NAME = "PDF2PDFOCR(github.com/LeoFCardoso/pdf2pdfocr)"
+"""Our signature as a producer"""
 
-def do_create_blank_pdf(param_filename_pdf, param_dimensions, param_image_resolution):
-    blank_output_pdf = PyPDF2.PdfWriter()
-    img_witdh = param_dimensions[0]
-    img_width_pt = (img_witdh / param_image_resolution) * 72.0
-    img_height = param_dimensions[1]
-    img_height_pt = (img_height / param_image_resolution) * 72.0
-    blank_output_pdf.addBlankPage(img_width_pt, img_height_pt)
-    with open(param_filename_pdf, 'wb') as f:
-        blank_output_pdf.write(f)
-        f.close()
+PRODUCER_KEY = "/Producer"
 
 
 def percentual_float(x):
@@ -271,171 +66,27 @@ def percentual_float(x):
     return x
 
 
-class HocrTransformError(Exception):
-    pass
-
-
-class HocrTransform:
+@functools.lru_cache(maxsize=32)
+def build_info_dict(param_metadata_items):
     """
-    A class for converting documents from the hOCR format.
-    For details of the hOCR format, see:
-    http://docs.google.com/View?docid=dfxcv4vc_67g844kf
-
-    Adapted from https://github.com/jbarlow83/OCRmyPDF/blob/master/ocrmypdf/hocrtransform.py
+    Build the final document info dictionary from (key, value) metadata pairs (str / bytes values only),
+    appending our producer signature. Cached so batch / library usage over files sharing the same
+    metadata does not rebuild the dictionary per file.
     """
-
-    def __init__(self, hocr_file_name, dpi):
-        self.rect = namedtuple('Rect', ['x1', 'y1', 'x2', 'y2'])
-        self.dpi = dpi
-        self.boxPattern = re.compile(r'bbox((\s+\d+){4})')
-        self.hocr = ElementTree.parse(hocr_file_name)
-        # if the hOCR file has a namespace, ElementTree requires its use to
-        # find elements
-        matches = re.match(r'({.*})html', self.hocr.getroot().tag)
-        self.xmlns = ''
-        if matches:
-            self.xmlns = matches.group(1)
-        # get dimension in pt (not pixel!!!!) of the OCRed image
-        self.width, self.height = None, None
-        for div in self.hocr.findall(
-                ".//%sdiv[@class='ocr_page']" % self.xmlns):
-            coords = self.element_coordinates(div)
-            pt_coords = self.pt_from_pixel(coords)
-            self.width = pt_coords.x2 - pt_coords.x1
-            self.height = pt_coords.y2 - pt_coords.y1
-            # there shouldn't be more than one, and if there is, we don't want it
-            break
-        if self.width is None or self.height is None:
-            raise HocrTransformError("hocr file is missing page dimensions")
-
-    def __str__(self):
-        """
-        Return the textual content of the HTML body
-        """
-        if self.hocr is None:
-            return ''
-        body = self.hocr.find(".//%sbody" % self.xmlns)
-        if body:
-            return self._get_element_text(body)
-        else:
-            return ''
-
-    def _get_element_text(self, element):
-        """
-        Return the textual content of the element and its children
-        """
-        text = ''
-        if element.text is not None:
-            text += element.text
-        for child in element:
-            text += self._get_element_text(child)
-        if element.tail is not None:
-            text += element.tail
-        return text
-
-    def element_coordinates(self, element):
-        """
-        Returns a tuple containing the coordinates of the bounding box around
-        an element
-        """
-        out = (0, 0, 0, 0)
-        if 'title' in element.attrib:
-            matches = self.boxPattern.search(element.attrib['title'])
-            if matches:
-                coords = matches.group(1).split()
-                out = self.rect._make(int(coords[n]) for n in range(4))
-        return out
-
-    def pt_from_pixel(self, pxl):
-        """
-        Returns the quantity in PDF units (pt) given quantity in pixels
-        """
-        return self.rect._make(
-            (c / self.dpi * inch) for c in pxl)
-
-    def replace_unsupported_chars(self, s):
-        """
-        Given an input string, returns the corresponding string that:
-        - is available in the helvetica facetype
-        - does not contain any ligature (to allow easy search in the PDF file)
-        """
-        # The 'u' before the character to replace indicates that it is a
-        # unicode character
-        s = s.replace(u"ﬂ", "fl")
-        s = s.replace(u"ﬁ", "fi")
-        return s
-
-    def to_pdf(self, out_file_name, image_file_name=None, show_bounding_boxes=False, fontname="Helvetica",
-               invisible_text=True):
-        """
-        Creates a PDF file with an image superimposed on top of the text.
-        Text is positioned according to the bounding box of the lines in
-        the hOCR file.
-        The image need not be identical to the image used to create the hOCR
-        file.
-        It can have a lower resolution, different color mode, etc.
-        """
-        # create the PDF file
-        # page size in points (1/72 in.)
-        pdf = Canvas(
-            out_file_name, pagesize=(self.width, self.height), pageCompression=1)
-        # draw bounding box for each paragraph
-        # light blue for bounding box of paragraph
-        pdf.setStrokeColorRGB(0, 1, 1)
-        # light blue for bounding box of paragraph
-        pdf.setFillColorRGB(0, 1, 1)
-        pdf.setLineWidth(0)  # no line for bounding box
-        for elem in self.hocr.findall(
-                ".//%sp[@class='%s']" % (self.xmlns, "ocr_par")):
-            elemtxt = self._get_element_text(elem).rstrip()
-            if len(elemtxt) == 0:
-                continue
-            pxl_coords = self.element_coordinates(elem)
-            pt = self.pt_from_pixel(pxl_coords)
-            # draw the bbox border
-            if show_bounding_boxes:
-                pdf.rect(pt.x1, self.height - pt.y2, pt.x2 - pt.x1, pt.y2 - pt.y1, fill=1)
-        # check if element with class 'ocrx_word' are available
-        # otherwise use 'ocr_line' as fallback
-        elemclass = "ocr_line"
-        if self.hocr.find(".//%sspan[@class='ocrx_word']" % self.xmlns) is not None:
-            elemclass = "ocrx_word"
-        # itterate all text elements
-        # light green for bounding box of word/line
-        pdf.setStrokeColorRGB(1, 0, 0)
-        pdf.setLineWidth(0.5)  # bounding box line width
-        pdf.setDash(6, 3)  # bounding box is dashed
-        pdf.setFillColorRGB(0, 0, 0)  # text in black
-        for elem in self.hocr.findall(".//%sspan[@class='%s']" % (self.xmlns, elemclass)):
-            elemtxt = self._get_element_text(elem).rstrip()
-            elemtxt = self.replace_unsupported_chars(elemtxt)
-            if len(elemtxt) == 0:
-                continue
-            pxl_coords = self.element_coordinates(elem)
-            pt = self.pt_from_pixel(pxl_coords)
-            # draw the bbox border
-            if show_bounding_boxes:
-                pdf.rect(pt.x1, self.height - pt.y2, pt.x2 - pt.x1, pt.y2 - pt.y1, fill=0)
-            text = pdf.beginText()
-            fontsize = pt.y2 - pt.y1
-            text.setFont(fontname, fontsize)
-            if invisible_text:
-                text.setTextRenderMode(3)  # Invisible (indicates OCR text)
-            # set cursor to bottom left corner of bbox (adjust for dpi)
-            text.setTextOrigin(pt.x1, self.height - pt.y2)
-            # scale the width of the text to fill the width of the bbox
-            text.setHorizScale(100 * (pt.x2 - pt.x1) / pdf.stringWidth(elemtxt, fontname, fontsize))
-            # write the text to the page
-            text.textLine(elemtxt)
-            pdf.drawText(text)
-        #
-        # put the image on the page, scaled to fill the page
-        if image_file_name is not None:
-            pdf.drawImage(image_file_name, 0, 0, width=self.width, height=self.height)
-        # finish up the page and save it
-        pdf.showPage()
-        pdf.save()
-        #
+    info_dict_output = dict()
+    read_producer = False
+    for key, value in param_metadata_items:
+        if key == PRODUCER_KEY:
+            if isinstance(value, bytes):
+                value = str(value, errors="ignore")
+                value = "".join(filter(lambda x: x in string.printable, value))  # Try to remove unprintable
+            value = f"{value}; {OUR_NAME}"
+            read_producer = True
+        info_dict_output[key] = value
+    #
+    if not read_producer:
+        info_dict_output[PRODUCER_KEY] = OUR_NAME
+    return info_dict_output
 
 
 class Pdf2PdfOcrException(Exception):
@@ -459,6 +110,10 @@ class Pdf2PdfOcr:
     path_pdftoppm = ""
     cmd_pdffonts = "pdffonts"
     path_pdffonts = ""
+    cmd_pdfinfo = "pdfinfo"
+    path_pdfinfo = ""
+    cmd_pdfimages = "pdfimages"
+    path_pdfimages = ""
     cmd_ps2pdf = "ps2pdf"
     path_ps2pdf = ""
     cmd_pdf2ps = "pdf2ps"
@@ -499,11 +154,11 @@ class Pdf2PdfOcr:
         #
         # A random prefix to support multiple execution in parallel
         self.prefix = ''.join(random.SystemRandom().choice(string.ascii_uppercase + string.digits) for _ in range(5))
-        # The temp dir
-        self.tmp_dir = tempfile.gettempdir() + os.path.sep + "pdf2pdfocr_{0}".format(self.prefix) + os.path.sep
-        os.mkdir(self.tmp_dir)
+        # The temp dir (one private directory per job, so globs never scan unrelated temp files)
+        self.tmp_dir = tempfile.mkdtemp(prefix="pdf2pdfocr_{0}_".format(self.prefix)) + os.path.sep
         #
         self.verbose_mode = args.verbose_mode
+        self._path_index = None  # Lazy built by which_tool
         self.check_external_tools()
         # Handle arguments from command line
         self.safe_mode = args.safe_mode
@@ -511,6 +166,7 @@ class Pdf2PdfOcr:
         self.ignore_existing_text = args.ignore_existing_text
         self.blank_pages = []
         self.blank_pages_dimensions = []
+        self.embedded_images_extracted = False
         self.check_protection_mode = args.check_protection_mode
         self.avoid_high_pages_mode = args.max_pages is not None
         self.avoid_high_pages_pages = args.max_pages
@@ -548,6 +204,9 @@ class Pdf2PdfOcr:
         self.tess_psm = args.tess_psm
         if self.tess_psm is None:
             self.tess_psm = "1"  # Default
+        self.tess_threads = args.tess_threads
+        if self.tess_threads is None:
+            self.tess_threads = 1  # Default - one tesseract OpenMP thread per parallel execution
         self.image_resolution = args.image_resolution
         self.text_generation_strategy = args.text_generation_strategy
         if self.text_generation_strategy not in ["tesseract", "native"]:
@@ -582,12 +241,52 @@ class Pdf2PdfOcr:
             self.cpu_to_use = 1
         self.debug("Parallel operations will use {0} CPUs".format(self.cpu_to_use))
         #
-        self.main_pool = multiprocessing.Pool(self.cpu_to_use)
+        # When the optional tesserocr binding is installed, each pool worker preloads the OCR engine once.
+        # Only do it where do_ocr_tesseract can consume the engine: per-page tesseract strategy without
+        # extra flags - the textonly batch path and the native strategy never touch it, and preloading
+        # there would cost model load time and memory in every worker for nothing
+        pool_initializer = None
+        pool_initargs = ()
+        if (self.ocr_engine == "tesseract" and self.text_generation_strategy == "tesseract"
+                and not self.tesseract_can_textonly_pdf and self.extra_ocr_flag is None):
+            pool_initializer = _init_tesserocr_worker
+            pool_initargs = (self.tess_langs, self.tess_psm, self.tesseract_can_textonly_pdf)
+        self.main_pool = multiprocessing.Pool(self.cpu_to_use, initializer=pool_initializer, initargs=pool_initargs)
+        #
+
+    def which_tool(self, param_cmd):
+        """
+        Find an external tool in $PATH. The first lookup indexes every PATH directory with one readdir
+        each; later lookups are dictionary probes instead of shutil.which's stat sequence per PATH entry
+        for every tool. Falls back to shutil.which for anything the index misses (e.g. PATHEXT corner
+        cases on Windows).
+        """
+        if self._path_index is None:
+            path_index = {}
+            for path_dir in os.environ.get("PATH", os.defpath).split(os.pathsep):
+                try:
+                    dir_entries = os.listdir(path_dir or os.curdir)
+                except OSError:
+                    continue
+                for dir_entry in dir_entries:
+                    key = dir_entry.lower() if self.shell_mode else dir_entry  # Windows is case insensitive
+                    path_index.setdefault(key, os.path.join(path_dir, dir_entry))
+            self._path_index = path_index
         #
+        if self.shell_mode:
+            for path_ext in [''] + os.environ.get("PATHEXT", "").split(os.pathsep):
+                result = self._path_index.get((param_cmd + path_ext).lower())
+                if result is not None:
+                    return result
+        else:
+            result = self._path_index.get(param_cmd)
+            if result is not None and os.path.isfile(result) and os.access(result, os.X_OK):
+                return result
+        return shutil.which(param_cmd)
 
     def check_external_tools(self):
         """Check if external tools are available, aborting or warning in case of any error."""
-        self.path_tesseract = shutil.which(self.cmd_tesseract)
+        self.path_tesseract = self.which_tool(self.cmd_tesseract)
         if self.path_tesseract is None:
             eprint("tesseract not found. Aborting...")
             sys.exit(1)
@@ -595,52 +294,60 @@ class Pdf2PdfOcr:
         self.tesseract_can_textonly_pdf = self.test_tesseract_textonly_pdf()
         self.tesseract_version = self.get_tesseract_version()
         #
-        self.path_cuneiform = shutil.which(self.cmd_cuneiform)
+        self.path_cuneiform = self.which_tool(self.cmd_cuneiform)
         if self.path_cuneiform is None:
             self.debug("cuneiform not available")
         #
         # Try to avoid errors on Windows with native OS "convert" command
         # http://savage.net.au/ImageMagick/html/install-convert.html
         # https://www.imagemagick.org/script/magick.php
-        self.path_convert = shutil.which(self.cmd_convert)
+        self.path_convert = self.which_tool(self.cmd_convert)
         if not self.test_convert():
-            self.path_convert = shutil.which(self.cmd_magick)
+            self.path_convert = self.which_tool(self.cmd_magick)
         if self.path_convert is None:
             eprint("convert/magick from ImageMagick not found. Aborting...")
             sys.exit(1)
         #
-        self.path_mogrify = shutil.which(self.cmd_mogrify)
+        self.path_mogrify = self.which_tool(self.cmd_mogrify)
         if self.path_mogrify is None:
             eprint("mogrify from ImageMagick not found. Aborting...")
             sys.exit(1)
         #
-        self.path_file = shutil.which(self.cmd_file)
+        self.path_file = self.which_tool(self.cmd_file)
         if self.path_file is None:
             eprint("file not found. Aborting...")
             sys.exit(1)
         #
-        self.path_pdftoppm = shutil.which(self.cmd_pdftoppm)
+        self.path_pdftoppm = self.which_tool(self.cmd_pdftoppm)
         if self.path_pdftoppm is None:
             eprint("pdftoppm (poppler) not found. Aborting...")
             sys.exit(1)
         if self.get_pdftoppm_version() <= parse_version("0.70.0"):
             self.log("External tool 'pdftoppm' is outdated. Please upgrade poppler")
         #
-        self.path_pdffonts = shutil.which(self.cmd_pdffonts)
+        self.path_pdffonts = self.which_tool(self.cmd_pdffonts)
         if self.path_pdffonts is None:
             eprint("pdffonts (poppler) not found. Aborting...")
             sys.exit(1)
         #
-        self.path_ps2pdf = shutil.which(self.cmd_ps2pdf)
-        self.path_pdf2ps = shutil.which(self.cmd_pdf2ps)
+        self.path_pdfinfo = self.which_tool(self.cmd_pdfinfo)
+        if self.path_pdfinfo is None:
+            self.log("External tool 'pdfinfo' not available. Input file validation will use PyPDF2 (slower)")
+        #
+        self.path_pdfimages = self.which_tool(self.cmd_pdfimages)
+        if self.path_pdfimages is None:
+            self.log("External tool 'pdfimages' not available. Scanned PDF files will always be rasterized")
+        #
+        self.path_ps2pdf = self.which_tool(self.cmd_ps2pdf)
+        self.path_pdf2ps = self.which_tool(self.cmd_pdf2ps)
         if self.path_ps2pdf is None or self.path_pdf2ps is None:
             eprint("ps2pdf or pdf2ps (ghostscript) not found. File repair will not work...")
         #
-        self.path_gs = shutil.which(self.cmd_gs)
+        self.path_gs = self.which_tool(self.cmd_gs)
         if self.path_gs is None:
             eprint("ghostscript not found. Param 'ignore-existing-text' will not work...")
         #
-        self.path_qpdf = shutil.which(self.cmd_qpdf)
+        self.path_qpdf = self.which_tool(self.cmd_qpdf)
         if self.path_qpdf is None:
             self.log("External tool 'qpdf' not available. Merge can be slow")
         else:
@@ -702,17 +409,17 @@ class Pdf2PdfOcr:
         self.debug("User conversion params: {0}".format(self.user_convert_params))
         self.define_output_files()
         self.initial_cleanup()
-        self.convert_input_to_images()
-        # TODO - create param to user pass input page range for OCR
-        image_file_list = sorted(glob.glob(self.tmp_dir + "{0}*.{1}".format(self.prefix, self.extension_images)))
-        if self.input_file_number_of_pages is None:
-            self.input_file_number_of_pages = len(image_file_list)
-        self.check_avoid_high_pages()
-        # TODO - create param to user pass image filters before OCR
-        self.check_blank_pages(image_file_list)
-        self.autorotate_info(image_file_list)
-        self.deskew(image_file_list)
-        self.external_ocr(image_file_list)
+        if not self.pipeline_convert_and_ocr():
+            self.convert_input_to_images()
+            # TODO - create param to user pass input page range for OCR
+            image_file_list = sorted(glob.glob(self.tmp_dir + "{0}*.{1}".format(self.prefix, self.extension_images)))
+            if self.input_file_number_of_pages is None:
+                self.input_file_number_of_pages = len(image_file_list)
+            self.check_avoid_high_pages()
+            # TODO - create param to user pass image filters before OCR
+            self.check_blank_pages(image_file_list)
+            self.autorotate_info(image_file_list)
+            self.external_ocr(image_file_list)  # Deskew, when enabled, is applied inside the OCR tasks
         if not self.ocr_ignored:
             self.join_ocred_pdf()
             self.create_text_output()
@@ -768,6 +475,8 @@ This software is free, but if you like it, please donate to support new features
 
     def _merge_ocr(self, image_pdf_file_path, text_pdf_file_path, result_pdf_file_path, tag):
         # Merge OCR background PDF into the main PDF document making a PDF sandwich
+        import PyPDF2
+        from PyPDF2.errors import PdfReadError
         self.debug("Merging with OCR")
         if self.path_qpdf is not None:
             try:
@@ -871,13 +580,29 @@ This software is free, but if you like it, please donate to support new features
         if convert_params == "":
             convert_params = preset_best
         #
+        if self.user_convert_params == "jpeg" and img2pdf is not None:
+            # The jpeg preset keeps pages as JPEG - img2pdf wraps the existing files into PDF objects
+            # directly (lossless, no decode / re-encode), so convert and the later merge are not needed
+            self.log("Rebuilding PDF from images (direct JPEG embedding)")
+            with open(self.tmp_dir + self.prefix + "-input_unprotected.pdf", "wb") as f_img2pdf:
+                f_img2pdf.write(img2pdf.convert(rebuild_list))
+            self.debug("PDF rebuilding completed")
+            if not self.ocr_ignored:
+                self._merge_ocr((self.tmp_dir + self.prefix + "-input_unprotected.pdf"),
+                                (self.tmp_dir + self.prefix + "-ocr.pdf"),
+                                (self.tmp_dir + self.prefix + "-OUTPUT.pdf"), "rebuild-merge")
+            else:
+                shutil.copyfile((self.tmp_dir + self.prefix + "-input_unprotected.pdf"), (self.tmp_dir + self.prefix + "-OUTPUT.pdf"))
+            return
+        #
         self.log("Rebuilding PDF from images")
         rebuild_pool_map = self.main_pool.starmap_async(do_rebuild,
                                                         zip(rebuild_list,
                                                             itertools.repeat(self.path_convert),
                                                             itertools.repeat(convert_params),
                                                             itertools.repeat(self.tmp_dir),
-                                                            itertools.repeat(self.shell_mode)))
+                                                            itertools.repeat(self.shell_mode),
+                                                            itertools.repeat(self.verbose_mode)))
         rebuild_wait_rounds = 0
         while not rebuild_pool_map.ready() and (self.main_pool is not None):
             rebuild_wait_rounds += 1
@@ -889,11 +614,7 @@ This software is free, but if you like it, please donate to support new features
         rebuilt_pdf_file_list = sorted(glob.glob(self.tmp_dir + "REBUILD_{0}*.pdf".format(self.prefix)))
         self.debug("We have {0} rebuilt PDF files".format(len(rebuilt_pdf_file_list)))
         if len(rebuilt_pdf_file_list) > 0:
-            pdf_merger = PyPDF2.PdfMerger()
-            for rebuilt_pdf_file in rebuilt_pdf_file_list:
-                pdf_merger.append(PyPDF2.PdfReader(rebuilt_pdf_file, strict=False))
-            pdf_merger.write(self.tmp_dir + self.prefix + "-input_unprotected.pdf")
-            pdf_merger.close()
+            self._merge_pdf_list(rebuilt_pdf_file_list, self.tmp_dir + self.prefix + "-input_unprotected.pdf", "join-rebuild")
         else:
             self.cleanup()
             raise Pdf2PdfOcrException("No PDF files generated after image rebuilding. This is not expected. Aborting.")
@@ -929,26 +650,49 @@ This software is free, but if you like it, please donate to support new features
         # Create final text output
         if self.create_text_mode:
             text_files = sorted(glob.glob(self.tmp_dir + self.prefix + "*.txt"))
-            text_io_wrapper = open(self.output_file_text, 'wb')
-            with text_io_wrapper as outfile:
+            with open(self.output_file_text, 'wb') as outfile:
                 for fname in text_files:
                     with open(fname, 'rb') as infile:
-                        outfile.write(infile.read())
-            #
-            text_io_wrapper.close()
+                        shutil.copyfileobj(infile, outfile, 1 << 20)  # Chunked copy - memory stays bounded
             #
             self.log("Created final text file")
 
+    def _merge_pdf_list(self, pdf_file_list, output_file, tag):
+        """
+        Merge a list of PDF files into a single output file.
+        Prefer qpdf (libqpdf - C++) when available, falling back to pure Python merge with PyPDF2.
+        """
+        if self.path_qpdf is not None:
+            # Use an argument file to avoid OS command line size limits with high page counts
+            args_file = self.tmp_dir + "qpdf_merge_args_{0}-{1}.txt".format(self.prefix, tag)
+            with open(args_file, "w") as f_args:
+                f_args.write("\n".join(["--empty", "--pages"] + pdf_file_list + ["--", output_file]) + "\n")
+            pmerge = subprocess.Popen(
+                [self.path_qpdf, "@" + args_file],
+                stdout=subprocess.DEVNULL,
+                stderr=open(self.tmp_dir + "err_merge-qpdf-list-{0}-{1}.log".format(self.prefix, tag), "wb"),
+                shell=self.shell_mode)
+            pmerge.wait()
+            # qpdf returns 3 when only warnings were issued
+            if pmerge.returncode in (0, 3) and os.path.isfile(output_file):
+                return
+            eprint("Warning: qpdf file merge failed. Trying again with PyPDF2.")
+        #
+        # PdfWriter.append_pages_from_reader does a single pass copying only page objects, avoiding
+        # PdfMerger bookkeeping (bookmarks / outline tree) that is useless here
+        import PyPDF2
+        pdf_writer = PyPDF2.PdfWriter()
+        for pdf_file in pdf_file_list:
+            pdf_writer.append_pages_from_reader(PyPDF2.PdfReader(pdf_file, strict=False))
+        with open(output_file, "wb") as f_out:
+            pdf_writer.write(f_out)
+
     def join_ocred_pdf(self):
         # Join PDF files into one file that contains all OCR "backgrounds"
         text_pdf_file_list = sorted(glob.glob(self.tmp_dir + "{0}*.{1}".format(self.prefix, "pdf")))
         self.debug("We have {0} ocr'ed files".format(len(text_pdf_file_list)))
         if len(text_pdf_file_list) > 0:
-            pdf_merger = PyPDF2.PdfMerger()
-            for text_pdf_file in text_pdf_file_list:
-                pdf_merger.append(PyPDF2.PdfReader(text_pdf_file, strict=False))
-            pdf_merger.write(self.tmp_dir + self.prefix + "-ocr.pdf")
-            pdf_merger.close()
+            self._merge_pdf_list(text_pdf_file_list, self.tmp_dir + self.prefix + "-ocr.pdf", "join-ocr")
         else:
             self.cleanup()
             raise Pdf2PdfOcrException("No PDF files generated after OCR. This is not expected. Aborting.")
@@ -959,36 +703,75 @@ This software is free, but if you like it, please donate to support new features
         if self.ocr_engine in ["cuneiform", "tesseract"]:
             self.log("Starting OCR with {0}...".format(self.ocr_engine))
             image_list_for_external_ocr = [x for x in image_file_list if x not in self.blank_pages]
+            pages_to_process = len(image_list_for_external_ocr)
+            # Deskew is fused into the OCR tasks (one image read per page instead of one more full pass)
+            ocr_deskew_threshold = self.deskew_threshold if self.use_deskew_mode else None
+            if self.use_deskew_mode:
+                self.debug("Applying deskew during OCR (will rebuild final PDF file)")
             if self.ocr_engine == "cuneiform":
-                ocr_pool_map = self.main_pool.starmap_async(do_ocr_cuneiform,
-                                                            zip(image_list_for_external_ocr,
-                                                                itertools.repeat(self.extra_ocr_flag),
-                                                                itertools.repeat(self.tess_langs),
-                                                                itertools.repeat(self.tmp_dir),
-                                                                itertools.repeat(self.shell_mode),
-                                                                itertools.repeat(self.path_cuneiform)))
+                ocr_iterator = self.main_pool.imap_unordered(do_ocr_cuneiform_star,
+                                                             zip(image_list_for_external_ocr,
+                                                                 itertools.repeat(self.extra_ocr_flag),
+                                                                 itertools.repeat(self.tess_langs),
+                                                                 itertools.repeat(self.tmp_dir),
+                                                                 itertools.repeat(self.shell_mode),
+                                                                 itertools.repeat(self.path_cuneiform),
+                                                                 itertools.repeat(ocr_deskew_threshold),
+                                                                 itertools.repeat(self.path_mogrify),
+                                                                 itertools.repeat(self.verbose_mode)))
+            elif self.ocr_engine == "tesseract" and self.text_generation_strategy == "tesseract" and self.tesseract_can_textonly_pdf:
+                # Batch mode - shard images and run one tesseract per shard, amortizing engine startup over many pages
+                ocr_shards = self.calculate_tesseract_shards(image_file_list)
+                self.debug("OCR will use {0} tesseract shards".format(len(ocr_shards)))
+                ocr_iterator = self.main_pool.imap_unordered(do_ocr_tesseract_batch_star,
+                                                             zip(ocr_shards,
+                                                                 itertools.repeat(self.extra_ocr_flag),
+                                                                 itertools.repeat(self.tess_langs),
+                                                                 itertools.repeat(self.tess_psm),
+                                                                 itertools.repeat(self.tmp_dir),
+                                                                 itertools.repeat(self.shell_mode),
+                                                                 itertools.repeat(self.path_tesseract),
+                                                                 itertools.repeat(self.tess_threads),
+                                                                 itertools.repeat(ocr_deskew_threshold),
+                                                                 itertools.repeat(self.path_mogrify),
+                                                                 itertools.repeat(self.verbose_mode)))
             elif self.ocr_engine == "tesseract":
-                ocr_pool_map = self.main_pool.starmap_async(do_ocr_tesseract,
-                                                            zip(image_list_for_external_ocr,
-                                                                itertools.repeat(self.extra_ocr_flag),
-                                                                itertools.repeat(self.tess_langs),
-                                                                itertools.repeat(self.tess_psm),
-                                                                itertools.repeat(self.tmp_dir),
-                                                                itertools.repeat(self.shell_mode),
-                                                                itertools.repeat(self.path_tesseract),
-                                                                itertools.repeat(self.text_generation_strategy),
-                                                                itertools.repeat(self.delete_temps),
-                                                                itertools.repeat(self.tesseract_can_textonly_pdf)))
+                ocr_iterator = self.main_pool.imap_unordered(do_ocr_tesseract_star,
+                                                             zip(image_list_for_external_ocr,
+                                                                 itertools.repeat(self.extra_ocr_flag),
+                                                                 itertools.repeat(self.tess_langs),
+                                                                 itertools.repeat(self.tess_psm),
+                                                                 itertools.repeat(self.tmp_dir),
+                                                                 itertools.repeat(self.shell_mode),
+                                                                 itertools.repeat(self.path_tesseract),
+                                                                 itertools.repeat(self.text_generation_strategy),
+                                                                 itertools.repeat(self.delete_temps),
+                                                                 itertools.repeat(self.tesseract_can_textonly_pdf),
+                                                                 itertools.repeat(self.tess_threads),
+                                                                 itertools.repeat(ocr_deskew_threshold),
+                                                                 itertools.repeat(self.path_mogrify),
+                                                                 itertools.repeat(self.verbose_mode)))
             else:
-                ocr_pool_map = None  # Should never happen
+                ocr_iterator = None  # Should never happen
             #
-            ocr_rounds = 0
-            while not ocr_pool_map.ready() and (self.main_pool is not None):
-                ocr_rounds += 1
-                pages_processed = len(glob.glob(self.tmp_dir + self.prefix + "*.tmp"))
-                if ocr_rounds % 10 == 0:
-                    self.log("Waiting for OCR to complete. {0}/{1} pages completed...".format(pages_processed, self.input_file_number_of_pages))
-                time.sleep(0.5)
+            # Progress comes from task completion messages (no temp dir polling)
+            pages_processed = 0
+            last_progress_log_time = time.time()
+            while pages_processed < pages_to_process and (self.main_pool is not None):
+                try:
+                    pages_processed += ocr_iterator.next(timeout=0.5)
+                except multiprocessing.TimeoutError:
+                    pass
+                except StopIteration:
+                    break
+                except Exception as e:
+                    # A worker task failed - follow the usual error convention instead of leaking
+                    # the raw traceback (and the pool / temp dir) through ocr()
+                    self.cleanup()
+                    raise Pdf2PdfOcrException("Fail to OCR images ({0}). Exiting.".format(e))
+                if (time.time() - last_progress_log_time) >= 5:
+                    self.log("Waiting for OCR to complete. {0}/{1} pages completed...".format(pages_processed, pages_to_process))
+                    last_progress_log_time = time.time()
             #
             if len(self.blank_pages) > 0:
                 for idx, blank_page_img in enumerate(self.blank_pages):
@@ -1001,6 +784,220 @@ This software is free, but if you like it, please donate to support new features
         else:
             self.log("OCR ignored")
             self.ocr_ignored = True
+            # Deskew is normally fused into the OCR tasks - without OCR it must run as its own stage
+            self.deskew(image_file_list)
+
+    def pipeline_convert_and_ocr(self):
+        """
+        Overlap page rendering with blank page check and OCR: instead of rendering all pages and only then
+        starting OCR, part of the pool renders page ranges while completed ranges are blank checked and
+        OCRed by the other part. Wall clock tends to the slowest stage plus first range latency, instead of
+        the sum of all stages. Used when the input is a PDF rendered in parallel ranges and OCR runs without
+        autorotate - other flows keep the staged execution.
+        :return: True when the pipeline handled rendering and OCR
+        """
+        if self.input_file_type != "application/pdf" or self.ocr_engine not in ["cuneiform", "tesseract"]:
+            return False
+        if self.use_autorotate or self.ignore_existing_text:
+            return False
+        parallel_page_ranges = self.calculate_ranges()
+        if parallel_page_ranges is None:
+            return False
+        if self.try_extract_embedded_images():
+            return False  # Page images are already extracted - there is no rendering to overlap with OCR
+        #
+        self.check_avoid_high_pages()
+        self.log("Converting input file to images and applying OCR (pipeline with {0})...".format(self.ocr_engine))
+        use_grayscale_images = not self.rebuild_pdf_from_images
+        # Deskew is fused into the OCR tasks (one image read per page instead of one more full pass)
+        ocr_deskew_threshold = self.deskew_threshold if self.use_deskew_mode else None
+        if self.use_deskew_mode:
+            self.debug("Applying deskew during OCR (will rebuild final PDF file)")
+        use_tesseract_batch = (self.ocr_engine == "tesseract" and self.text_generation_strategy == "tesseract"
+                               and self.tesseract_can_textonly_pdf)
+        # All pool callbacks run on the pool result handler thread - the lock only guards against the
+        # main thread reading the counters and the initial render submission loop below
+        pipeline_lock = threading.Lock()
+        pipeline_state = {"pages_done": 0, "render_failed": False, "render_short": False, "task_error": None, "in_flight": 0,
+                          "pending_checks": {}, "range_images": {}}
+        pending_ranges = list(parallel_page_ranges)
+
+        def on_task_error(param_exception):
+            with pipeline_lock:
+                pipeline_state["task_error"] = param_exception
+
+        def pipeline_aborted():
+            with pipeline_lock:
+                return pipeline_state["render_failed"] or pipeline_state["render_short"] or pipeline_state["task_error"] is not None
+
+        def submit_task(task_function, task_args, on_done):
+            # in_flight lets the main loop drain running tasks before falling back to the staged flow
+            with pipeline_lock:
+                pipeline_state["in_flight"] += 1
+
+            def task_callback(task_result):
+                try:
+                    on_done(task_result)
+                finally:
+                    with pipeline_lock:
+                        pipeline_state["in_flight"] -= 1
+
+            def task_error_callback(param_exception):
+                on_task_error(param_exception)
+                with pipeline_lock:
+                    pipeline_state["in_flight"] -= 1
+
+            self.main_pool.apply_async(task_function, task_args, callback=task_callback, error_callback=task_error_callback)
+
+        def submit_next_render():
+            if pipeline_aborted():
+                return
+            with pipeline_lock:
+                if not pending_ranges:
+                    return
+                page_range = pending_ranges.pop(0)
+            submit_task(do_pdftoimage,
+                        (self.path_pdftoppm, page_range, self.input_file, self.image_resolution, self.tmp_dir,
+                         self.prefix, self.shell_mode, use_grayscale_images, self.verbose_mode),
+                        lambda ret_code, pr=page_range: on_render_done(pr, ret_code))
+
+        def on_render_done(page_range, ret_code):
+            try:
+                if ret_code != 0:
+                    with pipeline_lock:
+                        pipeline_state["render_failed"] = True
+                    return
+                range_images = self.find_range_images(page_range)
+                if len(range_images) != (page_range[1] - page_range[0] + 1):
+                    # pdftoppm exited 0 but rendered fewer pages than the range spans (e.g. damaged input).
+                    # Waiting for the missing pages would never end - fall back to the staged flow.
+                    with pipeline_lock:
+                        pipeline_state["render_short"] = True
+                    return
+                submit_next_render()
+                with pipeline_lock:
+                    pipeline_state["pending_checks"][page_range] = len(range_images)
+                    pipeline_state["range_images"][page_range] = range_images
+                for range_image in range_images:
+                    submit_task(do_check_img_colors_size, (range_image,),
+                                lambda colors_size, pr=page_range, img=range_image: on_blank_check_done(pr, img, colors_size))
+            except Exception as e:
+                on_task_error(e)
+
+        def on_blank_check_done(page_range, image_file, color_size_info):
+            try:
+                if pipeline_aborted():
+                    return
+                is_blank = (color_size_info[0] is not None) and (len(color_size_info[0]) == 1)
+                with pipeline_lock:
+                    if is_blank:
+                        self.blank_pages.append(image_file)
+                        self.blank_pages_dimensions.append(color_size_info[1])
+                    pipeline_state["pending_checks"][page_range] -= 1
+                    range_ready = (pipeline_state["pending_checks"][page_range] == 0)
+                if is_blank:
+                    pdf_file_img = image_file.replace("." + self.extension_images, ".pdf")
+                    do_create_blank_pdf(pdf_file_img, color_size_info[1], self.image_resolution)
+                    on_pages_ocred(1)
+                if range_ready:
+                    submit_range_ocr(pipeline_state["range_images"][page_range])
+            except Exception as e:
+                on_task_error(e)
+
+        def submit_range_ocr(range_images):
+            if pipeline_aborted():
+                return
+            # Contiguous runs of non blank pages (blank page PDF files are synthesized above)
+            runs = []
+            current_run = []
+            for range_image in range_images:
+                if range_image in self.blank_pages:
+                    if current_run:
+                        runs.append(current_run)
+                        current_run = []
+                else:
+                    current_run.append(range_image)
+            if current_run:
+                runs.append(current_run)
+            for run in runs:
+                if use_tesseract_batch:
+                    # One tesseract per run, amortizing engine startup - same as calculate_tesseract_shards
+                    submit_task(do_ocr_tesseract_batch,
+                                (run, self.extra_ocr_flag, self.tess_langs, self.tess_psm, self.tmp_dir, self.shell_mode,
+                                 self.path_tesseract, self.tess_threads, ocr_deskew_threshold, self.path_mogrify,
+                                 self.verbose_mode),
+                                lambda _, n=len(run): on_pages_ocred(n))
+                elif self.ocr_engine == "tesseract":
+                    for run_image in run:
+                        submit_task(do_ocr_tesseract,
+                                    (run_image, self.extra_ocr_flag, self.tess_langs, self.tess_psm, self.tmp_dir,
+                                     self.shell_mode, self.path_tesseract, self.text_generation_strategy, self.delete_temps,
+                                     self.tesseract_can_textonly_pdf, self.tess_threads, ocr_deskew_threshold,
+                                     self.path_mogrify, self.verbose_mode),
+                                    lambda _: on_pages_ocred(1))
+                else:
+                    for run_image in run:
+                        submit_task(do_ocr_cuneiform,
+                                    (run_image, self.extra_ocr_flag, self.tess_langs, self.tmp_dir, self.shell_mode,
+                                     self.path_cuneiform, ocr_deskew_threshold, self.path_mogrify, self.verbose_mode),
+                                    lambda _: on_pages_ocred(1))
+
+        def on_pages_ocred(number_of_pages):
+            with pipeline_lock:
+                pipeline_state["pages_done"] += number_of_pages
+
+        # Keep part of the pool free for blank check and OCR tasks - submitting every render upfront would
+        # make the pool finish all rendering before the first OCR task runs (plain FIFO), i.e. no overlap
+        for _ in range(max(1, self.cpu_to_use // 2)):
+            submit_next_render()
+        #
+        pages_to_process = self.input_file_number_of_pages
+        last_progress_log_time = time.time()
+        while self.main_pool is not None:
+            with pipeline_lock:
+                pages_done = pipeline_state["pages_done"]
+                render_failed = pipeline_state["render_failed"]
+                render_short = pipeline_state["render_short"]
+                task_error = pipeline_state["task_error"]
+                in_flight = pipeline_state["in_flight"]
+            if render_failed:
+                self.cleanup()
+                raise Pdf2PdfOcrException("Fail to create images from PDF. Exiting.")
+            if task_error is not None:
+                self.cleanup()
+                raise Pdf2PdfOcrException("Fail to OCR images ({0}). Exiting.".format(task_error))
+            if render_short and in_flight == 0:
+                # Remove everything the pipeline produced - stale page images, OCR output and blank page
+                # bookkeeping would duplicate or misplace pages when the staged flow reruns from scratch
+                eprint("Warning: pdftoppm created less page images than expected. Retrying without pipeline.")
+                for temp_file in glob.glob(self.tmp_dir + self.prefix + "*"):
+                    Pdf2PdfOcr.best_effort_remove(temp_file)
+                del self.blank_pages[:]
+                del self.blank_pages_dimensions[:]
+                return False
+            if not render_short and pages_done >= pages_to_process:
+                break
+            if (time.time() - last_progress_log_time) >= 5:
+                self.log("Waiting for pipeline OCR to complete. {0}/{1} pages completed...".format(pages_done, pages_to_process))
+                last_progress_log_time = time.time()
+            time.sleep(0.5)
+        #
+        self.log("OCR completed")
+        self.ocr_ignored = False
+        return True
+
+    def find_range_images(self, page_range):
+        """Image files rendered for a page range, in page order (pdftoppm puts the page number after the last '-')"""
+        range_images = []
+        for image_file in sorted(glob.glob(self.tmp_dir + "{0}*.{1}".format(self.prefix, self.extension_images))):
+            image_no_ext = os.path.splitext(os.path.basename(image_file))[0]
+            try:
+                page_number = int(image_no_ext.rsplit("-", 1)[1])
+            except (IndexError, ValueError):
+                continue
+            if page_range[0] <= page_number <= page_range[1]:
+                range_images.append(image_file)
+        return range_images
 
     def check_blank_pages(self, image_file_list):
         self.log("Checking blank pages")
@@ -1025,7 +1022,9 @@ This software is free, but if you like it, please donate to support new features
                                                                    itertools.repeat(self.tmp_dir),
                                                                    itertools.repeat(self.tess_langs),
                                                                    itertools.repeat(self.path_tesseract),
-                                                                   itertools.repeat(self.tesseract_version)))
+                                                                   itertools.repeat(self.tesseract_version),
+                                                                   itertools.repeat(self.tess_threads),
+                                                                   itertools.repeat(self.verbose_mode)))
             autorotate_rounds = 0
             while not autorotate_pool_map.ready() and (self.main_pool is not None):
                 autorotate_rounds += 1
@@ -1048,6 +1047,7 @@ This software is free, but if you like it, please donate to support new features
         #
         if self.use_autorotate and not skip_autorotate:
             self.debug("Autorotate final output")
+            import PyPDF2
             file_source = open(param_source_file, 'rb')
             pre_output_pdf = PyPDF2.PdfReader(file_source, strict=False)
             final_output_pdf = PyPDF2.PdfWriter()
@@ -1067,9 +1067,9 @@ This software is free, but if you like it, please donate to support new features
                     rotate_value = 0
                 rotation_angles.append(rotate_value)
             #
-            for i in range(len(pre_output_pdf.pages)):
-                page = pre_output_pdf.pages[i]
-                page.rotateClockwise(rotation_angles[i])
+            # The pages property caches the page tree traversal (indexed access walks it per page)
+            for page, rotation_angle in zip(pre_output_pdf.pages, rotation_angles):
+                page.rotateClockwise(rotation_angle)
                 final_output_pdf.addPage(page)
             #
             with open(param_dest_file, 'wb') as f:
@@ -1080,7 +1080,7 @@ This software is free, but if you like it, please donate to support new features
         else:
             # No autorotate, just rename the file to next method process correctly
             self.debug("Autorotate skipped")
-            os.rename(param_source_file, param_dest_file)
+            os.replace(param_source_file, param_dest_file)  # Atomic, and overwrites a leftover target on Windows
 
     def deskew(self, image_file_list):
         if self.use_deskew_mode:
@@ -1097,9 +1097,109 @@ This software is free, but if you like it, please donate to support new features
                     self.log("Waiting for deskew to complete. {0}/{1} pages completed...".format(pages_processed, self.input_file_number_of_pages))
                 time.sleep(0.5)
 
+    def _page_geometry(self):
+        """
+        Per page rotation and media box size, read with a single pdfinfo execution. pdfimages extracts
+        the raw stored image, so the extraction fast path needs the page dictionary geometry: a page
+        rotated with /Rotate would be OCRed sideways, and an image smaller than its page would produce
+        a wrongly placed text layer - rasterization honors both.
+        :return: (rotations, sizes) dicts keyed by page number - sizes in points - or None on failure
+        """
+        try:
+            pinfo = subprocess.Popen([self.path_pdfinfo, '-f', '1', '-l', str(self.input_file_number_of_pages), self.input_file],
+                                     stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, shell=self.shell_mode)
+            pinfo_output, pinfo_errors = pinfo.communicate()
+            if pinfo.returncode != 0:
+                return None
+            rotations = {}
+            sizes = {}
+            for line in pinfo_output.decode("utf-8", errors="ignore").splitlines():
+                # Per page lines look like "Page    1 rot:  90" and "Page    1 size: 612 x 792 pts (letter)"
+                fields = line.split()
+                if len(fields) >= 4 and fields[0] == "Page":
+                    if fields[2] == "rot:":
+                        rotations[int(fields[1])] = int(fields[3])
+                    elif fields[2] == "size:" and len(fields) >= 6:
+                        sizes[int(fields[1])] = (float(fields[3]), float(fields[5]))
+            if len(rotations) != self.input_file_number_of_pages or len(sizes) != self.input_file_number_of_pages:
+                return None
+        except Exception:
+            return None
+        return rotations, sizes
+
+    def try_extract_embedded_images(self):
+        """
+        Fast path for scanned PDFs (the main use case of this tool): when every page is exactly one
+        embedded JPEG, extract the original JPEG files losslessly with pdfimages instead of
+        re-rasterizing each page through pdftoppm at a fixed resolution.
+        :return: True when the page images were extracted
+        """
+        if self.path_pdfimages is None or self.ignore_existing_text:
+            return False
+        if self.input_file_number_of_pages is None or self.input_file_number_of_pages > 999:
+            return False  # pdfimages numbers output files with 3 digits - sorted order would break beyond that
+        if self.check_for_text():
+            return False  # Existing text (stamps, prior OCR) would be lost when rebuilding from raw images
+        if self.path_pdfinfo is None:
+            return False
+        page_geometry = self._page_geometry()
+        if page_geometry is None:
+            return False
+        page_rotations, page_sizes = page_geometry
+        if any(page_rotation != 0 for page_rotation in page_rotations.values()):
+            return False  # Rotation set in the page dictionary is lost on raw extracted images
+        try:
+            plist = subprocess.Popen([self.path_pdfimages, '-list', self.input_file], stdout=subprocess.PIPE,
+                                     stderr=subprocess.DEVNULL, shell=self.shell_mode)
+            plist_output, plist_errors = plist.communicate()
+            if plist.returncode != 0:
+                return False
+            image_lines = plist_output.decode("utf-8", errors="ignore").strip().splitlines()[2:]  # Skip the two header lines
+        except Exception:
+            return False
+        #
+        pages_seen = set()
+        for image_line in image_lines:
+            # Columns: page num type width height color comp bpc enc interp object ID x-ppi y-ppi size ratio
+            fields = image_line.split()
+            if len(fields) < 14:
+                return False
+            page_number, image_type, image_enc = fields[0], fields[2], fields[8]
+            if image_type != "image" or image_enc != "jpeg" or page_number in pages_seen:
+                return False  # More than one image in a page, masks, or non JPEG encoding - rasterize as usual
+            try:
+                image_width_pts = float(fields[3]) / float(fields[12]) * 72.0
+                image_height_pts = float(fields[4]) / float(fields[13]) * 72.0
+                page_width_pts, page_height_pts = page_sizes[int(page_number)]
+            except (ValueError, ZeroDivisionError, KeyError):
+                return False
+            if (abs(image_width_pts - page_width_pts) > page_width_pts * 0.02
+                    or abs(image_height_pts - page_height_pts) > page_height_pts * 0.02):
+                return False  # Image does not cover the media box - the rebuilt page would be misplaced or cropped
+            pages_seen.add(page_number)
+        if len(pages_seen) != self.input_file_number_of_pages:
+            return False  # Some page has no image (e.g. pure text) - rasterize as usual
+        #
+        self.log("All pages are single embedded JPEG images. Extracting them directly (no rasterization)")
+        pextract = subprocess.Popen([self.path_pdfimages, '-j', self.input_file, self.tmp_dir + self.prefix],
+                                    stdout=subprocess.DEVNULL,
+                                    stderr=open(self.tmp_dir + "err_pdfimages-{0}.log".format(self.prefix), "wb"),
+                                    shell=self.shell_mode)
+        pextract.wait()
+        extracted_images = glob.glob(self.tmp_dir + self.prefix + "*.jpg")
+        if pextract.returncode != 0 or len(extracted_images) != self.input_file_number_of_pages:
+            self.debug("Embedded image extraction failed - falling back to rasterization")
+            for extracted_image in extracted_images:
+                Pdf2PdfOcr.best_effort_remove(extracted_image)
+            return False
+        self.embedded_images_extracted = True
+        return True
+
     def convert_input_to_images(self):
         self.log("Converting input file to images...")
         if self.input_file_type == "application/pdf":
+            if self.embedded_images_extracted or self.try_extract_embedded_images():
+                return
             input_file_for_images = self.input_file
             if self.ignore_existing_text:
                 input_file_for_images = self.tmp_dir + "_" + self.prefix + "-input_file_for_images.pdf"
@@ -1110,6 +1210,8 @@ This software is free, but if you like it, please donate to support new features
                                                              "wb"), shell=self.shell_mode)
                 p_ignore_text.wait()
             #
+            # When images are not used to rebuild the final PDF, they only feed OCR and can be grayscale
+            use_grayscale_images = not self.rebuild_pdf_from_images
             parallel_page_ranges = self.calculate_ranges()
             if parallel_page_ranges is not None:
                 # TODO - try to use method inside this class (encapsulate do_pdftoimage)
@@ -1119,11 +1221,13 @@ This software is free, but if you like it, please donate to support new features
                                                                                        itertools.repeat(self.image_resolution),
                                                                                        itertools.repeat(self.tmp_dir),
                                                                                        itertools.repeat(self.prefix),
-                                                                                       itertools.repeat(self.shell_mode)))
+                                                                                       itertools.repeat(self.shell_mode),
+                                                                                       itertools.repeat(use_grayscale_images),
+                                                                                       itertools.repeat(self.verbose_mode)))
             else:
                 # Without page info, only alternative is going sequentialy (without range)
                 do_pdftoimage_result_code = do_pdftoimage(self.path_pdftoppm, None, input_file_for_images, self.image_resolution, self.tmp_dir,
-                                                          self.prefix, self.shell_mode)
+                                                          self.prefix, self.shell_mode, use_grayscale_images, self.verbose_mode)
                 do_pdftoimage_result_codes = [do_pdftoimage_result_code]
             #
             if not all(ret_code == 0 for ret_code in do_pdftoimage_result_codes):
@@ -1166,7 +1270,60 @@ This software is free, but if you like it, please donate to support new features
             if self.create_text_mode and os.path.isfile(self.output_file_text):
                 raise Pdf2PdfOcrException("{0} already exists and safe mode is enabled. Exiting.".format(self.output_file_text))
 
-    def validate_pdf_input_file(self):
+    # pdfinfo keys of interest, mapped to PDF document information dictionary keys
+    pdfinfo_metadata_keys = {"Title": "/Title", "Subject": "/Subject", "Keywords": "/Keywords", "Author": "/Author",
+                             "Creator": "/Creator", "Producer": "/Producer", "CreationDate": "/CreationDate", "ModDate": "/ModDate"}
+
+    @staticmethod
+    def _pdf_date_from_iso(param_value):
+        """Convert a 'pdfinfo -isodates' timestamp into PDF date string format (D:YYYYMMDDHHmmSS with optional zone)"""
+        iso_match = re.match(r"^(\d{4})-(\d{2})-(\d{2})T(\d{2}):(\d{2}):(\d{2})(Z|[+-]\d{2}:\d{2})?$", param_value)
+        if not iso_match:
+            return param_value
+        result = "D:" + "".join(iso_match.group(1, 2, 3, 4, 5, 6))
+        zone = iso_match.group(7)
+        if zone == "Z":
+            result += "Z"
+        elif zone:
+            result += zone[0:3] + "'" + zone[4:6] + "'"
+        return result
+
+    def _validate_pdf_input_file_pdfinfo(self):
+        """
+        Read page count, encryption flag and metadata with a single pdfinfo (poppler) execution.
+        Constant time regardless of page count, against a whole pure Python xref parse with PyPDF2.
+        :return: True on success
+        """
+        try:
+            pinfo = subprocess.Popen([self.path_pdfinfo, '-isodates', self.input_file], stdout=subprocess.PIPE,
+                                     stderr=subprocess.DEVNULL, shell=self.shell_mode)
+            pinfo_output, pinfo_errors = pinfo.communicate()
+            if pinfo.returncode != 0:
+                return False
+            pdfinfo_values = {}
+            for line in pinfo_output.decode("utf-8", errors="ignore").splitlines():
+                key, sep, value = line.partition(":")
+                if sep:
+                    pdfinfo_values[key.strip()] = value.strip()
+            self.input_file_number_of_pages = int(pdfinfo_values["Pages"])
+        except Exception:
+            return False
+        #
+        self.input_file_is_encrypted = not pdfinfo_values.get("Encrypted", "no").startswith("no")
+        if not self.input_file_is_encrypted:
+            metadata = dict()
+            for pdfinfo_key, pdf_key in self.pdfinfo_metadata_keys.items():
+                if pdfinfo_key in pdfinfo_values:
+                    value = pdfinfo_values[pdfinfo_key]
+                    if pdfinfo_key in ("CreationDate", "ModDate"):
+                        value = self._pdf_date_from_iso(value)
+                    metadata[pdf_key] = value
+            self.input_file_metadata = metadata
+        return True
+
+    def _validate_pdf_input_file_pypdf(self):
+        import PyPDF2
+        from PyPDF2.errors import PdfReadError
         try:
             pdf_file_obj = open(self.input_file, 'rb')
             pdf_reader = PyPDF2.PdfReader(pdf_file_obj, strict=False)
@@ -1180,11 +1337,18 @@ This software is free, but if you like it, please donate to support new features
             eprint("Warning: could not read input file number of pages.")
             self.input_file_number_of_pages = None  # Will be calculated later based on number of image files to process
         #
-        self.check_avoid_high_pages()
-        #
         self.input_file_is_encrypted = pdf_reader.is_encrypted
         if not self.input_file_is_encrypted:
             self.input_file_metadata = pdf_reader.metadata
+
+    def validate_pdf_input_file(self):
+        pdfinfo_success = False
+        if self.path_pdfinfo is not None:
+            pdfinfo_success = self._validate_pdf_input_file_pdfinfo()
+        if not pdfinfo_success:
+            self._validate_pdf_input_file_pypdf()
+        #
+        self.check_avoid_high_pages()
         #
         if self.check_text_mode:
             self.input_file_has_text = self.check_for_text()
@@ -1305,13 +1469,17 @@ This software is free, but if you like it, please donate to support new features
 
     def calculate_ranges(self):
         """
-        calculate ranges to run pdftoppm in parallel. Each CPU available will run well defined page range
+        calculate ranges to run pdftoppm in parallel. Pages are split in contiguous ranges smaller than
+        (pages / cpu), and pool workers consume them dynamically: with mixed light and heavy pages a worker
+        that finishes a light range picks up another one instead of sitting idle until the heaviest
+        equal-size range is done.
         :return:
         """
         if (self.input_file_number_of_pages is None) or (self.input_file_number_of_pages < 20):  # 20 to avoid unnecessary parallel operation
             return None
         #
-        range_size = math.ceil(self.input_file_number_of_pages / self.cpu_to_use)
+        # About 4 ranges per CPU, with a minimum range size to keep pdftoppm startup cost amortized
+        range_size = max(5, math.ceil(self.input_file_number_of_pages / (self.cpu_to_use * 4)))
         number_of_ranges = math.ceil(self.input_file_number_of_pages / range_size)
         result = []
         for i in range(0, number_of_ranges):
@@ -1322,56 +1490,104 @@ This software is free, but if you like it, please donate to support new features
                 range_end = self.input_file_number_of_pages
             result.append((range_start, range_end))
         # Check result
-        check_pages = 0
-        for created_range in result:
-            check_pages += (created_range[1] - created_range[0]) + 1
+        check_pages = sum((range_end - range_start) + 1 for range_start, range_end in result)
         if check_pages != self.input_file_number_of_pages:
             raise ArithmeticError("Please check 'calculate_ranges' function, something is wrong...")
         #
         return result
 
+    def calculate_tesseract_shards(self, image_file_list):
+        """
+        Split images in shards for batch OCR. Each shard must be a contiguous run of non blank pages, so that
+        shard PDF files (named after their first page) sort in global page order together with blank page PDFs.
+        :return: list of lists of image files
+        """
+        # Contiguous runs of non blank pages
+        runs = []
+        current_run = []
+        for image_file in image_file_list:
+            if image_file in self.blank_pages:
+                if current_run:
+                    runs.append(current_run)
+                    current_run = []
+            else:
+                current_run.append(image_file)
+        if current_run:
+            runs.append(current_run)
+        #
+        total_images = sum(len(run) for run in runs)
+        if total_images == 0:
+            return []
+        shard_size = math.ceil(total_images / self.cpu_to_use)
+        shards = []
+        for run in runs:
+            for i in range(0, len(run), shard_size):
+                shards.append(run[i:i + shard_size])
+        return shards
+
     def edit_producer(self):
+        import PyPDF2
         self.debug("Editing producer")
         param_source_file = self.tmp_dir + self.prefix + "-OUTPUT-ROTATED.pdf"
-        file_source = open(param_source_file, 'rb')
-        pre_output_pdf = PyPDF2.PdfReader(file_source, strict=False)
-        final_output_pdf = PyPDF2.PdfWriter()
-        for i in range(len(pre_output_pdf.pages)):
-            page = pre_output_pdf.pages[i]
-            final_output_pdf.addPage(page)
-        info_dict_output = dict()
-        # Our signature as a producer
-        our_name = "PDF2PDFOCR(github.com/LeoFCardoso/pdf2pdfocr)"
-        read_producer = False
-        producer_key = "/Producer"
-        if self.input_file_metadata is not None:
-            for key in self.input_file_metadata:
-                value = self.input_file_metadata[key]
-                if key == producer_key:
-                    if type(value) == ByteStringObject:
-                        value = str(value, errors="ignore")
-                        value = "".join(filter(lambda x: x in string.printable, value))  # Try to remove unprintable
-                    value = value + "; " + our_name
-                    read_producer = True
-                #
+        # Fast path: when the temp file already carries our producer tag (e.g. reprocessing our own
+        # output), a rewrite would only append the same signature again - just move the file
+        try:
+            with open(param_source_file, 'rb') as f_probe:
+                f_probe.seek(max(0, os.path.getsize(param_source_file) - 16384))
+                source_tail = f_probe.read()
+            # PDF writers escape literal strings (qpdf/pikepdf write '\(', PyPDF2 writes octal '\050');
+            # decode those escapes so the signature matches regardless of which writer produced the file
+            source_tail = re.sub(rb"\\([0-7]{3})", lambda m_oct: bytes([int(m_oct.group(1), 8)]), source_tail)
+            source_tail = source_tail.replace(b"\\(", b"(").replace(b"\\)", b")")
+            if OUR_NAME.encode("latin-1") in source_tail:
+                self.debug("Producer already tagged - moving temp file without rewrite")
                 try:
-                    # Check if value can be accepted by pypdf API
-                    PyPDF2.generic.createStringObject(value)
-                    info_dict_output[key] = value
-                except TypeError:
+                    os.replace(param_source_file, self.output_file)  # Atomic, and overwrites on Windows
+                except OSError:
+                    shutil.move(param_source_file, self.output_file)  # Output on another filesystem
+                return
+        except OSError:
+            pass  # Probe is best effort only - fall through to the normal rewrite
+        metadata_items = ()
+        if self.input_file_metadata is not None:
+            for key, value in self.input_file_metadata.items():
+                # Only str / bytes values are accepted by the pypdf API (PyPDF2 string objects subclass them)
+                if not isinstance(value, (str, bytes)):
                     # This can happen with some array properties.
                     eprint("Warning: property " + key + " not copied to final PDF")
+            metadata_items = tuple((key, value) for key, value in self.input_file_metadata.items() if isinstance(value, (str, bytes)))
+        info_dict_output = build_info_dict(metadata_items)
         #
-        if not read_producer:
-            info_dict_output[producer_key] = our_name
-        #
-        final_output_pdf.add_metadata(info_dict_output)
-        #
-        with open(self.output_file, 'wb') as f:
-            final_output_pdf.write(f)
-            f.close()
+        try:
+            import pikepdf
+        except ImportError:
+            pikepdf = None  # Optional (libqpdf binding). Used to speed up PDF rewriting when available.
+        if pikepdf is not None:
+            # Metadata only mutation with libqpdf - page objects are never deserialized into Python
+            with pikepdf.open(param_source_file) as final_pdf:
+                docinfo = pikepdf.Dictionary()
+                for key, value in info_dict_output.items():
+                    try:
+                        docinfo[key] = pikepdf.String(value) if isinstance(value, bytes) else str(value)
+                    except (TypeError, ValueError):
+                        eprint("Warning: property " + key + " not copied to final PDF")
+                final_pdf.trailer["/Info"] = final_pdf.make_indirect(docinfo)
+                final_pdf.save(self.output_file)
+            return
         #
-        file_source.close()
+        with open(param_source_file, 'rb') as file_source:
+            # Memory map the source: the xref random access of PyPDF2 becomes page cache reads
+            # instead of one seek plus read syscall pair per object
+            with mmap.mmap(file_source.fileno(), 0, access=mmap.ACCESS_READ) as mapped_source:
+                pre_output_pdf = PyPDF2.PdfReader(mapped_source, strict=False)
+                final_output_pdf = PyPDF2.PdfWriter()
+                # Single pass copy of the page objects - content streams are not rebuilt page by page
+                final_output_pdf.append_pages_from_reader(pre_output_pdf)
+                final_output_pdf.add_metadata(info_dict_output)
+                #
+                # Large buffer coalesces the many small writes of PyPDF2 into few syscalls
+                with open(self.output_file, 'wb', buffering=1 << 20) as f:
+                    final_output_pdf.write(f)
 
     @staticmethod
     def best_effort_remove(filename):
@@ -1408,6 +1624,11 @@ if __name__ == '__main__':
     # Adjust Imagemagick parallel control
     # https://legacy.imagemagick.org/script/resources.php
     os.environ['MAGICK_THREAD_LIMIT'] = '1'
+    # Bound Imagemagick RAM usage - with one convert/mogrify per page running on every core, unbounded
+    # pixel caches can blow up resident memory on large page images. Above these limits Imagemagick
+    # transparently pages to disk.
+    os.environ.setdefault('MAGICK_MEMORY_LIMIT', '2GiB')
+    os.environ.setdefault('MAGICK_AREA_LIMIT', '128MP')
     #
     # Arguments
     parser = argparse.ArgumentParser(
@@ -1472,6 +1693,9 @@ Examples:
     parser.add_argument("-m", dest="tess_psm", action="store", required=False,
                         help="force tesseract to use OCR with specific \"pagesegmode\" (default: tesseract "
                              "OCR default = 1) [tesseract only]. Use with caution")
+    parser.add_argument("--tess-threads", dest="tess_threads", action="store", default=None, type=int,
+                        help="force tesseract to use <TESS_THREADS> OpenMP threads per page (OMP_THREAD_LIMIT) [tesseract only]. "
+                             "Useful with low '-j' values on machines with many cores (default: 1)")
     parser.add_argument("-x", dest="extra_ocr_flag", action="store", required=False,
                         help="add extra command line flags in select OCR engine for all pages. Use with caution")
     parser.add_argument("--timeout", dest="timeout", action="store", default=None, type=int,
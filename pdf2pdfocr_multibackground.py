@@ -87,7 +87,6 @@ for i in range(imagepdf.getNumPages()):
             textpage.mergeRotatedTranslatedPage(imagepage, (-1 * rotate_angle), image_page_x / 2,
                                                 image_page_x / 2, expand=False)
     #
-    textpage.compressContentStreams()
     output.addPage(textpage)
 #
 with open(sys.argv[3], 'wb') as f:
@@ -0,0 +1,534 @@
+#!/usr/bin/env python3
+##############################################################################
+# Copyright (c) 2022: Leonardo Cardoso
+# https://github.com/LeoFCardoso/pdf2pdfocr
+##############################################################################
+# Worker functions executed by the multiprocessing pool of pdf2pdfocr.
+# This module is kept lightweight on purpose: heavy libraries (PyPDF2, PIL, reportlab, bs4) are
+# imported inside the functions that need them, so worker process startup (relevant with the
+# 'spawn' start method on Windows) does not pay for imports the task will never use.
+###############################################################################
+import os
+import re
+import shlex
+import subprocess
+import sys
+from collections import namedtuple
+from xml.etree import ElementTree
+
+__author__ = 'Leonardo F. Cardoso'
+
+
+def eprint(*args, **kwargs):
+    print(*args, file=sys.stderr, flush=True, **kwargs)
+
+
+def log_sink(param_verbose, param_log_file_path):
+    """
+    Output sink for subprocess calls running once per page: a log file in verbose mode, otherwise
+    DEVNULL, avoiding one file create/close per page on big documents.
+    """
+    if param_verbose:
+        return open(param_log_file_path, "wb")
+    return subprocess.DEVNULL
+
+
+def do_pdftoimage(param_path_pdftoppm, param_page_range, param_input_file, param_image_resolution, param_tmp_dir,
+                  param_prefix, param_shell_mode, param_grayscale, param_verbose):
+    """
+    Will be called from multiprocessing, so no global variables are allowed.
+    Convert PDF to image file.
+    """
+    command_line_list = [param_path_pdftoppm]
+    first_page = 0
+    last_page = 0
+    if param_page_range is not None:
+        first_page = param_page_range[0]
+        last_page = param_page_range[1]
+        command_line_list += ['-f', str(first_page), '-l', str(last_page)]
+    #
+    command_line_list += ['-r', str(param_image_resolution)]
+    if param_grayscale:
+        # Images are only OCR input (not used to rebuild the final PDF), so grayscale JPEG with tuned
+        # quality is enough for tesseract and means much less bytes to write, read and decode
+        command_line_list += ['-gray', '-jpegopt', 'quality=85']
+    command_line_list += ['-jpeg', param_input_file, param_tmp_dir + param_prefix]
+    pimage = subprocess.Popen(command_line_list, stdout=subprocess.DEVNULL,
+                              stderr=log_sink(param_verbose, param_tmp_dir + "pdftoppm_err_{0}-{1}-{2}.log".format(param_prefix, first_page, last_page)),
+                              shell=param_shell_mode)
+    pimage.wait()
+    return pimage.returncode
+
+
+def tesseract_env(param_tess_threads):
+    """
+    Build the environment for tesseract subprocess calls, limiting OpenMP threads per execution.
+    Tesseract spawns up to 4 OpenMP threads per invocation and this script already runs one tesseract
+    per CPU, so without the limit CPUs are oversubscribed (see comments in main block).
+    """
+    tess_env = os.environ.copy()
+    tess_env['OMP_THREAD_LIMIT'] = str(param_tess_threads)
+    return tess_env
+
+
+def do_autorotate_info(param_image_file, param_shell_mode, param_temp_dir, param_tess_lang, param_path_tesseract, param_tesseract_version,
+                       param_tess_threads, param_verbose):
+    """
+    Will be called from multiprocessing, so no global variables are allowed.
+    Do autorotate of images based on tesseract (execution with 'psm 0') information.
+    """
+    param_image_no_ext = os.path.splitext(os.path.basename(param_image_file))[0]
+    psm_parameter = "-psm" if (param_tesseract_version == 3) else "--psm"
+    tess_command_line = [param_path_tesseract, '-l', "osd+" + param_tess_lang, psm_parameter, '0', param_image_file,
+                         param_temp_dir + param_image_no_ext]
+    ptess1 = subprocess.Popen(tess_command_line,
+                              stdout=log_sink(param_verbose, param_temp_dir + "autorot_tess_out_{0}.log".format(param_image_no_ext)),
+                              stderr=log_sink(param_verbose, param_temp_dir + "autorot_tess_err_{0}.log".format(param_image_no_ext)),
+                              shell=param_shell_mode, env=tesseract_env(param_tess_threads))
+    ptess1.wait()
+
+
+def do_deskew(param_image_file, param_threshold, param_shell_mode, param_path_mogrify):
+    """
+    Will be called from multiprocessing, so no global variables are allowed.
+    Do a deskew of image.
+    """
+    pd = subprocess.Popen([param_path_mogrify, '-deskew', param_threshold, param_image_file], shell=param_shell_mode)
+    pd.wait()
+    return True
+
+
+_tesserocr_api = None
+"""Per worker process tesseract API instance - see _init_tesserocr_worker"""
+
+
+def _init_tesserocr_worker(param_tess_lang, param_tess_psm, param_tess_can_textonly_pdf):
+    """
+    Pool worker initializer. When the optional 'tesserocr' binding is installed, load the OCR engine
+    (language and model files) once per worker process instead of once per page.
+    """
+    global _tesserocr_api
+    try:
+        import tesserocr
+        _tesserocr_api = tesserocr.PyTessBaseAPI(lang=param_tess_lang, psm=int(param_tess_psm))
+        _tesserocr_api.SetVariable("tessedit_create_pdf", "1")
+        if param_tess_can_textonly_pdf:
+            _tesserocr_api.SetVariable("textonly_pdf", "1")
+        _tesserocr_api.SetVariable("tessedit_create_txt", "1")
+    except Exception:
+        _tesserocr_api = None  # Without tesserocr, workers keep using one tesseract execution per page
+
+
+def do_ocr_tesseract(param_image_file, param_extra_ocr_flag, param_tess_lang, param_tess_psm, param_temp_dir, param_shell_mode, param_path_tesseract,
+                     param_text_generation_strategy, param_delete_temps, param_tess_can_textonly_pdf, param_tess_threads,
+                     param_deskew_threshold, param_path_mogrify, param_verbose):
+    """
+    Will be called from multiprocessing, so no global variables are allowed.
+    Do OCR of image with tesseract. Deskew, when enabled, runs in the same task to avoid a whole extra
+    pool stage over all pages.
+    """
+    if param_deskew_threshold is not None:
+        do_deskew(param_image_file, param_deskew_threshold, param_shell_mode, param_path_mogrify)
+    param_image_no_ext = os.path.splitext(os.path.basename(param_image_file))[0]
+    ocr_done = False
+    if (_tesserocr_api is not None) and (param_extra_ocr_flag is None) and (param_text_generation_strategy == "tesseract"):
+        # Engine is already loaded in this worker process - skips one tesseract startup per page
+        try:
+            _tesserocr_api.ProcessPages(param_temp_dir + param_image_no_ext, param_image_file)
+            ocr_done = True
+        except Exception:
+            ocr_done = False  # Fall back to a plain tesseract execution below
+    if not ocr_done:
+        tess_command_line = [param_path_tesseract]
+        if type(param_extra_ocr_flag) == str:
+            tess_command_line.extend(param_extra_ocr_flag.split(" "))
+        tess_command_line.extend(['-l', param_tess_lang])
+        if param_text_generation_strategy == "tesseract":
+            tess_command_line += ['-c', 'tessedit_create_pdf=1']
+            if param_tess_can_textonly_pdf:
+                tess_command_line += ['-c', 'textonly_pdf=1']
+        #
+        if param_text_generation_strategy == "native":
+            tess_command_line += ['-c', 'tessedit_create_hocr=1']
+        #
+        tess_command_line += [
+            '-c', 'tessedit_create_txt=1',
+            '-c', 'tessedit_pageseg_mode=' + param_tess_psm,
+            param_image_file, param_temp_dir + param_image_no_ext]
+        pocr = subprocess.Popen(tess_command_line,
+                                stdout=subprocess.DEVNULL,
+                                stderr=log_sink(param_verbose, param_temp_dir + "tess_err_{0}.log".format(param_image_no_ext)),
+                                shell=param_shell_mode, env=tesseract_env(param_tess_threads))
+        pocr.wait()
+    if param_text_generation_strategy == "tesseract" and (not param_tess_can_textonly_pdf):
+        try:
+            import pikepdf
+        except ImportError:
+            pikepdf = None  # Optional (libqpdf binding). Used to speed up PDF rewriting when available.
+        pdf_file = param_temp_dir + param_image_no_ext + ".pdf"
+        pdf_file_tmp = param_temp_dir + param_image_no_ext + ".tesspdf"
+        os.replace(pdf_file, pdf_file_tmp)  # Atomic, and overwrites a leftover target on Windows
+        if pikepdf is not None:
+            # Fast path - rewrite with libqpdf, only dropping the image reference.
+            # Tesseract output is already Flate compressed, so no stream recompression is needed.
+            with pikepdf.open(pdf_file_tmp) as tess_pdf:
+                out_page = tess_pdf.pages[0]  # Tesseract PDF is always one page in this software
+                # Hack to obtain smaller file (delete the image reference)
+                if "/Resources" in out_page and "/XObject" in out_page["/Resources"]:
+                    out_page["/Resources"]["/XObject"] = pikepdf.Dictionary()
+                tess_pdf.save(pdf_file)
+        else:
+            import PyPDF2
+            output_pdf = PyPDF2.PdfWriter()
+            desc_pdf_file_tmp = open(pdf_file_tmp, 'rb')
+            tess_pdf = PyPDF2.PdfReader(desc_pdf_file_tmp, strict=False)
+            for imagepage in tess_pdf.pages:
+                output_pdf.addPage(imagepage)
+            #
+            output_pdf.removeImages(ignoreByteStringObject=False)
+            out_page = output_pdf.getPage(0)  # Tesseract PDF is always one page in this software
+            # Hack to obtain smaller file (delete the image reference)
+            out_page["/Resources"][PyPDF2.generic.createStringObject("/XObject")] = PyPDF2.generic.ArrayObject()
+            with open(pdf_file, 'wb') as f:
+                output_pdf.write(f)
+            desc_pdf_file_tmp.close()
+        # Try to save some temp space as tesseract generate PDF with same size of image
+        if param_delete_temps:
+            os.remove(pdf_file_tmp)
+    #
+    if param_text_generation_strategy == "native":
+        hocr = HocrTransform(param_temp_dir + param_image_no_ext + ".hocr", 300)
+        hocr.to_pdf(param_temp_dir + param_image_no_ext + ".pdf", image_file_name=None, show_bounding_boxes=False,
+                    invisible_text=True)
+
+
+def do_ocr_tesseract_star(param_list):
+    """Adapter for Pool.imap_unordered. Returns the number of pages processed, to track overall progress."""
+    do_ocr_tesseract(*param_list)
+    return 1
+
+
+def do_ocr_tesseract_batch(param_image_file_list, param_extra_ocr_flag, param_tess_lang, param_tess_psm, param_temp_dir, param_shell_mode,
+                           param_path_tesseract, param_tess_threads, param_deskew_threshold, param_path_mogrify, param_verbose):
+    """
+    Will be called from multiprocessing, so no global variables are allowed.
+    Do OCR of a list of images (shard) with a single tesseract execution, using the file list input format.
+    Tesseract generates one multipage PDF / text file per shard, amortizing engine startup (language and model
+    loading) over all pages of the shard instead of paying it once per page.
+    Deskew, when enabled, runs in the same task to avoid a whole extra pool stage over all pages.
+    """
+    if param_deskew_threshold is not None:
+        for param_image_file in param_image_file_list:
+            do_deskew(param_image_file, param_deskew_threshold, param_shell_mode, param_path_mogrify)
+    first_image_no_ext = os.path.splitext(os.path.basename(param_image_file_list[0]))[0]
+    # Shard output is named after the first page, so the sorted glob used to join PDFs keeps global page order
+    shard_base = param_temp_dir + first_image_no_ext + "-shard"
+    shard_list_file = shard_base + ".lst"  # Can't be ".txt" to avoid clash with tesseract text output
+    with open(shard_list_file, "w") as f_list:
+        f_list.write("\n".join(param_image_file_list) + "\n")
+    tess_command_line = [param_path_tesseract]
+    if type(param_extra_ocr_flag) == str:
+        tess_command_line.extend(param_extra_ocr_flag.split(" "))
+    tess_command_line.extend(['-l', param_tess_lang])
+    tess_command_line += [
+        '-c', 'tessedit_create_pdf=1',
+        '-c', 'textonly_pdf=1',
+        '-c', 'tessedit_create_txt=1',
+        '-c', 'tessedit_pageseg_mode=' + param_tess_psm,
+        shard_list_file, shard_base]
+    pocr = subprocess.Popen(tess_command_line,
+                            stdout=subprocess.DEVNULL,
+                            stderr=log_sink(param_verbose, param_temp_dir + "tess_err_{0}.log".format(first_image_no_ext)),
+                            shell=param_shell_mode, env=tesseract_env(param_tess_threads))
+    pocr.wait()
+
+
+def do_ocr_tesseract_batch_star(param_list):
+    """Adapter for Pool.imap_unordered. Returns the number of pages processed, to track overall progress."""
+    do_ocr_tesseract_batch(*param_list)
+    return len(param_list[0])
+
+
+def do_ocr_cuneiform(param_image_file, param_extra_ocr_flag, param_cunei_lang, param_temp_dir, param_shell_mode, param_path_cunei,
+                     param_deskew_threshold, param_path_mogrify, param_verbose):
+    """
+    Will be called from multiprocessing, so no global variables are allowed.
+    Do OCR of image with cuneiform. Deskew, when enabled, runs in the same task to avoid a whole extra
+    pool stage over all pages.
+    """
+    if param_deskew_threshold is not None:
+        do_deskew(param_image_file, param_deskew_threshold, param_shell_mode, param_path_mogrify)
+    param_image_no_ext = os.path.splitext(os.path.basename(param_image_file))[0]
+    cunei_command_line = [param_path_cunei]
+    if type(param_extra_ocr_flag) == str:
+        cunei_command_line.extend(param_extra_ocr_flag.split(" "))
+    cunei_command_line.extend(['-l', param_cunei_lang.lower(), "-f", "hocr", "-o", param_temp_dir + param_image_no_ext + ".hocr", param_image_file])
+    #
+    pocr = subprocess.Popen(cunei_command_line,
+                            stdout=log_sink(param_verbose, param_temp_dir + "cuneif_out_{0}.log".format(param_image_no_ext)),
+                            stderr=log_sink(param_verbose, param_temp_dir + "cuneif_err_{0}.log".format(param_image_no_ext)),
+                            shell=param_shell_mode)
+    pocr.wait()
+    # Sometimes, cuneiform fails to OCR and expected HOCR file is missing. Experiments show that English can be used to try a workaround.
+    if not os.path.isfile(param_temp_dir + param_image_no_ext + ".hocr") and param_cunei_lang.lower() != "eng":
+        eprint("Warning: fail to OCR file '{0}'. Trying again with English language.".format(param_image_no_ext))
+        cunei_command_line = [param_path_cunei]
+        if type(param_extra_ocr_flag) == str:
+            cunei_command_line.extend(param_extra_ocr_flag.split(" "))
+        cunei_command_line.extend(['-l', "eng", "-f", "hocr", "-o", param_temp_dir + param_image_no_ext + ".hocr", param_image_file])
+        pocr = subprocess.Popen(cunei_command_line,
+                                stdout=log_sink(param_verbose, param_temp_dir + "cuneif_out_eng_{0}.log".format(param_image_no_ext)),
+                                stderr=log_sink(param_verbose, param_temp_dir + "cuneif_err_eng_{0}.log".format(param_image_no_ext)),
+                                shell=param_shell_mode)
+        pocr.wait()
+    #
+    from bs4 import BeautifulSoup
+    bs_parser = "lxml"
+    if os.path.isfile(param_temp_dir + param_image_no_ext + ".hocr"):
+        # Try to fix unclosed meta tags, as cuneiform HOCR may be not well formed
+        with open(param_temp_dir + param_image_no_ext + ".hocr", "r") as fpr:
+            corrected_hocr = str(BeautifulSoup(fpr, bs_parser))
+    else:
+        eprint("Warning: fail to OCR file '{0}'. Page will not contain text.".format(param_image_no_ext))
+        # TODO try to use the same size as original PDF page (bbox is hard coded by now to look like A4 page - portrait)
+        corrected_hocr = str(BeautifulSoup('<div class="ocr_page" id="page_1" title="image x; bbox 0 0 1700 2400">', bs_parser))
+    with open(param_temp_dir + param_image_no_ext + ".fixed.hocr", "w") as fpw:
+        fpw.write(corrected_hocr)
+    #
+    hocr = HocrTransform(param_temp_dir + param_image_no_ext + ".fixed.hocr", 300)
+    hocr.to_pdf(param_temp_dir + param_image_no_ext + ".pdf", image_file_name=None, show_bounding_boxes=False, invisible_text=True)
+
+
+def do_ocr_cuneiform_star(param_list):
+    """Adapter for Pool.imap_unordered. Returns the number of pages processed, to track overall progress."""
+    do_ocr_cuneiform(*param_list)
+    return 1
+
+
+def do_rebuild(param_image_file, param_path_convert, param_convert_params, param_tmp_dir, param_shell_mode, param_verbose):
+    """
+    Will be called from multiprocessing, so no global variables are allowed.
+    Create one PDF file from image file.
+    """
+    param_image_no_ext = os.path.splitext(os.path.basename(param_image_file))[0]
+    # http://stackoverflow.com/questions/79968/split-a-string-by-spaces-preserving-quoted-substrings-in-python
+    convert_params_list = shlex.split(param_convert_params)
+    command_rebuild = [param_path_convert, param_image_file] + convert_params_list + [param_tmp_dir + "REBUILD_" + param_image_no_ext + ".pdf"]
+    prebuild = subprocess.Popen(
+        command_rebuild,
+        stdout=log_sink(param_verbose, param_tmp_dir + "convert_log_{0}.log".format(param_image_no_ext)),
+        stderr=log_sink(param_verbose, param_tmp_dir + "convert_err_{0}.log".format(param_image_no_ext)),
+        shell=param_shell_mode)
+    prebuild.wait()
+
+
+def do_check_img_greyscale(param_image_file):
+    """
+    Inspired in code provided by karl-k:
+    https://stackoverflow.com/questions/23660929/how-to-check-whether-a-jpeg-image-is-color-or-gray-scale-using-only-python-stdli
+    Check if image is monochrome (1 channel or 3 identical channels)
+    """
+    from PIL import Image, ImageChops
+    im = Image.open(param_image_file).convert('RGB')
+    rgb = im.split()
+    if ImageChops.difference(rgb[0], rgb[1]).getextrema()[1] != 0:
+        return False
+    if ImageChops.difference(rgb[0], rgb[2]).getextrema()[1] != 0:
+        return False
+    #
+    return True
+
+
+def do_check_img_colors_size(param_image_file):
+    """
+    Inspired in code provided by Raffael:
+    https://stackoverflow.com/questions/14041562/python-pil-detect-if-an-image-is-completely-black-or-white
+    Check if image is single color
+    """
+    from PIL import Image
+    im = Image.open(param_image_file)
+    colors = im.getcolors()
+    width, height = im.size
+    return colors, (width, height)
+
+
+def do_create_blank_pdf(param_filename_pdf, param_dimensions, param_image_resolution):
+    import PyPDF2
+    blank_output_pdf = PyPDF2.PdfWriter()
+    img_witdh = param_dimensions[0]
+    img_width_pt = (img_witdh / param_image_resolution) * 72.0
+    img_height = param_dimensions[1]
+    img_height_pt = (img_height / param_image_resolution) * 72.0
+    blank_output_pdf.addBlankPage(img_width_pt, img_height_pt)
+    with open(param_filename_pdf, 'wb') as f:
+        blank_output_pdf.write(f)
+        f.close()
+
+
+class HocrTransformError(Exception):
+    pass
+
+
+class HocrTransform:
+    """
+    A class for converting documents from the hOCR format.
+    For details of the hOCR format, see:
+    http://docs.google.com/View?docid=dfxcv4vc_67g844kf
+
+    Adapted from https://github.com/jbarlow83/OCRmyPDF/blob/master/ocrmypdf/hocrtransform.py
+    """
+
+    def __init__(self, hocr_file_name, dpi):
+        self.rect = namedtuple('Rect', ['x1', 'y1', 'x2', 'y2'])
+        self.dpi = dpi
+        self.boxPattern = re.compile(r'bbox((\s+\d+){4})')
+        self.hocr = ElementTree.parse(hocr_file_name)
+        # if the hOCR file has a namespace, ElementTree requires its use to
+        # find elements
+        matches = re.match(r'({.*})html', self.hocr.getroot().tag)
+        self.xmlns = ''
+        if matches:
+            self.xmlns = matches.group(1)
+        # get dimension in pt (not pixel!!!!) of the OCRed image
+        self.width, self.height = None, None
+        for div in self.hocr.findall(
+                ".//%sdiv[@class='ocr_page']" % self.xmlns):
+            coords = self.element_coordinates(div)
+            pt_coords = self.pt_from_pixel(coords)
+            self.width = pt_coords.x2 - pt_coords.x1
+            self.height = pt_coords.y2 - pt_coords.y1
+            # there shouldn't be more than one, and if there is, we don't want it
+            break
+        if self.width is None or self.height is None:
+            raise HocrTransformError("hocr file is missing page dimensions")
+
+    def __str__(self):
+        """
+        Return the textual content of the HTML body
+        """
+        if self.hocr is None:
+            return ''
+        body = self.hocr.find(".//%sbody" % self.xmlns)
+        if body:
+            return self._get_element_text(body)
+        else:
+            return ''
+
+    def _get_element_text(self, element):
+        """
+        Return the textual content of the element and its children
+        """
+        text = ''
+        if element.text is not None:
+            text += element.text
+        for child in element:
+            text += self._get_element_text(child)
+        if element.tail is not None:
+            text += element.tail
+        return text
+
+    def element_coordinates(self, element):
+        """
+        Returns a tuple containing the coordinates of the bounding box around
+        an element
+        """
+        out = (0, 0, 0, 0)
+        if 'title' in element.attrib:
+            matches = self.boxPattern.search(element.attrib['title'])
+            if matches:
+                coords = matches.group(1).split()
+                out = self.rect._make(int(coords[n]) for n in range(4))
+        return out
+
+    def pt_from_pixel(self, pxl):
+        """
+        Returns the quantity in PDF units (pt) given quantity in pixels
+        """
+        from reportlab.lib.units import inch
+        return self.rect._make(
+            (c / self.dpi * inch) for c in pxl)
+
+    def replace_unsupported_chars(self, s):
+        """
+        Given an input string, returns the corresponding string that:
+        - is available in the helvetica facetype
+        - does not contain any ligature (to allow easy search in the PDF file)
+        """
+        # The 'u' before the character to replace indicates that it is a
+        # unicode character
+        s = s.replace(u"ﬂ", "fl")
+        s = s.replace(u"ﬁ", "fi")
+        return s
+
+    def to_pdf(self, out_file_name, image_file_name=None, show_bounding_boxes=False, fontname="Helvetica",
+               invisible_text=True):
+        """
+        Creates a PDF file with an image superimposed on top of the text.
+        Text is positioned according to the bounding box of the lines in
+        the hOCR file.
+        The image need not be identical to the image used to create the hOCR
+        file.
+        It can have a lower resolution, different color mode, etc.
+        """
+        # create the PDF file
+        # page size in points (1/72 in.)
+        from reportlab.pdfgen.canvas import Canvas
+        pdf = Canvas(
+            out_file_name, pagesize=(self.width, self.height), pageCompression=1)
+        # draw bounding box for each paragraph
+        # light blue for bounding box of paragraph
+        pdf.setStrokeColorRGB(0, 1, 1)
+        # light blue for bounding box of paragraph
+        pdf.setFillColorRGB(0, 1, 1)
+        pdf.setLineWidth(0)  # no line for bounding box
+        for elem in self.hocr.findall(
+                ".//%sp[@class='%s']" % (self.xmlns, "ocr_par")):
+            elemtxt = self._get_element_text(elem).rstrip()
+            if len(elemtxt) == 0:
+                continue
+            pxl_coords = self.element_coordinates(elem)
+            pt = self.pt_from_pixel(pxl_coords)
+            # draw the bbox border
+            if show_bounding_boxes:
+                pdf.rect(pt.x1, self.height - pt.y2, pt.x2 - pt.x1, pt.y2 - pt.y1, fill=1)
+        # check if element with class 'ocrx_word' are available
+        # otherwise use 'ocr_line' as fallback
+        elemclass = "ocr_line"
+        if self.hocr.find(".//%sspan[@class='ocrx_word']" % self.xmlns) is not None:
+            elemclass = "ocrx_word"
+        # itterate all text elements
+        # light green for bounding box of word/line
+        pdf.setStrokeColorRGB(1, 0, 0)
+        pdf.setLineWidth(0.5)  # bounding box line width
+        pdf.setDash(6, 3)  # bounding box is dashed
+        pdf.setFillColorRGB(0, 0, 0)  # text in black
+        for elem in self.hocr.findall(".//%sspan[@class='%s']" % (self.xmlns, elemclass)):
+            elemtxt = self._get_element_text(elem).rstrip()
+            elemtxt = self.replace_unsupported_chars(elemtxt)
+            if len(elemtxt) == 0:
+                continue
+            pxl_coords = self.element_coordinates(elem)
+            pt = self.pt_from_pixel(pxl_coords)
+            # draw the bbox border
+            if show_bounding_boxes:
+                pdf.rect(pt.x1, self.height - pt.y2, pt.x2 - pt.x1, pt.y2 - pt.y1, fill=0)
+            text = pdf.beginText()
+            fontsize = pt.y2 - pt.y1
+            text.setFont(fontname, fontsize)
+            if invisible_text:
+                text.setTextRenderMode(3)  # Invisible (indicates OCR text)
+            # set cursor to bottom left corner of bbox (adjust for dpi)
+            text.setTextOrigin(pt.x1, self.height - pt.y2)
+            # scale the width of the text to fill the width of the bbox
+            text.setHorizScale(100 * (pt.x2 - pt.x1) / pdf.stringWidth(elemtxt, fontname, fontsize))
+            # write the text to the page
+            text.textLine(elemtxt)
+            pdf.drawText(text)
+        #
+        # put the image on the page, scaled to fill the page
+        if image_file_name is not None:
+            pdf.drawImage(image_file_name, 0, 0, width=self.width, height=self.height)
+        # finish up the page and save it
+        pdf.showPage()
+        pdf.save()
+        #